@@ -0,0 +1,16 @@
+"""
+Builds the optional Cython kernels used when numba is not installed:
+
+    python setup.py build_ext --inplace
+
+The solver runs without this step (numba kernels, then pure Python, are
+tried first/last); building the extension only matters for deployments
+that want native-speed kernels without a JIT dependency.
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="dssa-solver-kernels",
+    ext_modules=cythonize(["src/_ckernels.pyx"]),
+)
@@ -0,0 +1,190 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True, language_level=3
+"""
+Cython fallback for the numba kernels in _kernels.py, for environments where
+numba is not installed or not desired. Same flattened-instance layout and the
+same entry points (greedy scheduling and cost evaluation over contiguous
+int32 arrays); heuristic_solver picks numba first, then this extension, then
+the pure-Python implementations.
+
+Build in place with:  python setup.py build_ext --inplace  (from solver/).
+"""
+import numpy as np
+
+
+def flatten_instance(resources, agent_tasks, dependencies):
+    """
+    Flattens the per-agent task lists and dependency sets into the global
+    int32 arrays expected by the kernels; see _kernels.flatten_instance.
+    """
+    task_ptr = np.zeros(len(agent_tasks) + 1, dtype=np.int32)
+    for k, tasks in enumerate(agent_tasks):
+        task_ptr[k + 1] = task_ptr[k] + len(tasks)
+    total = int(task_ptr[-1])
+
+    sizes = np.empty(total, dtype=np.int32)
+    indeg = np.zeros(total, dtype=np.int32)
+    succ_count = np.zeros(total, dtype=np.int32)
+    for k, tasks in enumerate(agent_tasks):
+        base = task_ptr[k]
+        for i, size in enumerate(tasks):
+            sizes[base + i] = size
+        for i, deps in enumerate(dependencies[k]):
+            indeg[base + i] = len(deps)
+            for dep in deps:
+                succ_count[base + dep] += 1
+
+    succ_ptr = np.zeros(total + 1, dtype=np.int32)
+    np.cumsum(succ_count, out=succ_ptr[1:])
+    succ_idx = np.zeros(int(succ_ptr[-1]), dtype=np.int32)
+    fill = succ_ptr[:-1].copy()
+    for k, _ in enumerate(agent_tasks):
+        base = task_ptr[k]
+        for i, deps in enumerate(dependencies[k]):
+            for dep in deps:
+                succ_idx[fill[base + dep]] = base + i
+                fill[base + dep] += 1
+
+    resources_arr = np.asarray(resources, dtype=np.int32)
+    return resources_arr, task_ptr, sizes, succ_ptr, succ_idx, indeg
+
+
+cdef int _heap_push(long long[::1] heap, int n, long long key) noexcept nogil:
+    """Pushes key onto the int64 max-heap heap[:n]; returns the new size."""
+    cdef int i, parent
+    cdef long long tmp
+    heap[n] = key
+    i = n
+    n += 1
+    while i > 0:
+        parent = (i - 1) // 2
+        if heap[parent] < heap[i]:
+            tmp = heap[parent]
+            heap[parent] = heap[i]
+            heap[i] = tmp
+            i = parent
+        else:
+            break
+    return n
+
+
+cdef long long _heap_pop(long long[::1] heap, int *n) noexcept nogil:
+    """Pops the maximum off the int64 max-heap heap[:n[0]]; shrinks n[0]."""
+    cdef long long top = heap[0]
+    cdef int i, left, right, largest
+    cdef long long tmp
+    n[0] -= 1
+    heap[0] = heap[n[0]]
+    i = 0
+    while True:
+        left = 2 * i + 1
+        right = left + 1
+        largest = i
+        if left < n[0] and heap[left] > heap[largest]:
+            largest = left
+        if right < n[0] and heap[right] > heap[largest]:
+            largest = right
+        if largest == i:
+            break
+        tmp = heap[i]
+        heap[i] = heap[largest]
+        heap[largest] = tmp
+        i = largest
+    return top
+
+
+def greedy_schedule_cy(int[::1] resources, int[::1] task_ptr, int[::1] sizes,
+                       int[::1] succ_ptr, int[::1] succ_idx, int[::1] indeg):
+    """
+    Kahn-style greedy scheduler over the flattened instance, mirroring
+    _kernels.greedy_schedule_nb: all ready tasks sit in a max-heap keyed by
+    (size, then lowest global id); tasks too big for the remaining capacity
+    are parked until the next slot. Returns (count, agents, tasks, slots).
+    """
+    cdef int total = task_ptr[task_ptr.shape[0] - 1]
+    cdef int num_agents = task_ptr.shape[0] - 1
+    cdef int k, g, t, e, succ, count, n, num_parked, j, size, available_capacity
+    cdef long long key
+
+    agent_of_np = np.empty(total, dtype=np.int32)
+    cdef int[::1] agent_of = agent_of_np
+    for k in range(num_agents):
+        for g in range(task_ptr[k], task_ptr[k + 1]):
+            agent_of[g] = k
+
+    remaining_np = np.asarray(indeg).copy()
+    cdef int[::1] remaining = remaining_np
+
+    # Heap keys pack (size, total - g) so the max-heap yields the largest
+    # size first and the smallest global id among equal sizes.
+    heap_np = np.empty(total, dtype=np.int64)
+    parked_np = np.empty(total, dtype=np.int64)
+    cdef long long[::1] heap = heap_np
+    cdef long long[::1] parked = parked_np
+    n = 0
+    for g in range(total):
+        if remaining[g] == 0:
+            n = _heap_push(heap, n, (<long long> sizes[g] << 32) | <long long> (total - g))
+
+    out_agent_np = np.empty(total, dtype=np.int32)
+    out_task_np = np.empty(total, dtype=np.int32)
+    out_slot_np = np.empty(total, dtype=np.int32)
+    cdef int[::1] out_agent = out_agent_np
+    cdef int[::1] out_task = out_task_np
+    cdef int[::1] out_slot = out_slot_np
+    count = 0
+
+    for t in range(resources.shape[0]):
+        available_capacity = resources[t]
+        num_parked = 0
+        while n > 0:
+            key = _heap_pop(heap, &n)
+            size = <int> (key >> 32)
+            if size > available_capacity:
+                parked[num_parked] = key
+                num_parked += 1
+                continue
+            g = total - <int> (key & 0xFFFFFFFF)
+
+            out_agent[count] = agent_of[g]
+            out_task[count] = g - task_ptr[agent_of[g]]
+            out_slot[count] = t
+            count += 1
+            available_capacity -= size
+
+            for e in range(succ_ptr[g], succ_ptr[g + 1]):
+                succ = succ_idx[e]
+                remaining[succ] -= 1
+                if remaining[succ] == 0:
+                    n = _heap_push(heap, n, (<long long> sizes[succ] << 32) | <long long> (total - succ))
+
+        for j in range(num_parked):
+            n = _heap_push(heap, n, parked[j])
+
+    return count, out_agent_np, out_task_np, out_slot_np
+
+
+def evaluate_max_cost_cy(int[::1] sched_agent, int[::1] sched_slot, int num_agents):
+    """
+    Maximum average completion cost over agents for a schedule stored as two
+    parallel arrays (agent id, 0-indexed slot); see
+    _kernels.evaluate_max_cost_nb.
+    """
+    agent_sum_np = np.zeros(num_agents, dtype=np.int64)
+    agent_count_np = np.zeros(num_agents, dtype=np.int64)
+    cdef long long[::1] agent_sum = agent_sum_np
+    cdef long long[::1] agent_count = agent_count_np
+    cdef int j, k
+    cdef double best, cost
+
+    for j in range(sched_agent.shape[0]):
+        agent_sum[sched_agent[j]] += sched_slot[j] + 1
+        agent_count[sched_agent[j]] += 1
+
+    best = -1.0
+    for k in range(num_agents):
+        if agent_count[k] == 0:
+            return float('inf')
+        cost = agent_sum[k] / <double> agent_count[k]
+        if cost > best:
+            best = cost
+    return best
@@ -0,0 +1,751 @@
+"""
+Numba-compiled kernels for the heuristic solver.
+
+The kernels operate on a flattened instance: tasks of all agents are
+concatenated and identified by a global id g = task_ptr[agent] + local_id,
+with the dependency DAG stored as a single CSR over global ids. This keeps
+every hot loop on contiguous int32 arrays, which numba compiles to native
+code with no interpreter dispatch.
+
+This module requires numba; heuristic_solver falls back to the pure-Python
+implementations when the import fails.
+"""
+import numpy as np
+from numba import njit
+
+
+def flatten_instance(resources: list[int], agent_tasks: list[list[int]], dependencies: list[list[set[int]]]):
+    """
+    Flattens the per-agent task lists and dependency sets into the global
+    int32 arrays expected by the kernels:
+      resources_arr[t]      -- capacity of slot t,
+      task_ptr[k]           -- global id of the first task of agent k (length K+1),
+      sizes[g]              -- size of global task g,
+      succ_ptr/succ_idx     -- CSR of the dependency edges over global ids,
+      indeg[g]              -- number of dependencies of global task g.
+    """
+    task_ptr = np.zeros(len(agent_tasks) + 1, dtype=np.int32)
+    for k, tasks in enumerate(agent_tasks):
+        task_ptr[k + 1] = task_ptr[k] + len(tasks)
+    total = int(task_ptr[-1])
+
+    sizes = np.empty(total, dtype=np.int32)
+    indeg = np.zeros(total, dtype=np.int32)
+    succ_count = np.zeros(total, dtype=np.int32)
+    for k, tasks in enumerate(agent_tasks):
+        base = task_ptr[k]
+        for i, size in enumerate(tasks):
+            sizes[base + i] = size
+        for i, deps in enumerate(dependencies[k]):
+            indeg[base + i] = len(deps)
+            for dep in deps:
+                succ_count[base + dep] += 1
+
+    succ_ptr = np.zeros(total + 1, dtype=np.int32)
+    np.cumsum(succ_count, out=succ_ptr[1:])
+    succ_idx = np.zeros(int(succ_ptr[-1]), dtype=np.int32)
+    fill = succ_ptr[:-1].copy()
+    for k, _ in enumerate(agent_tasks):
+        base = task_ptr[k]
+        for i, deps in enumerate(dependencies[k]):
+            for dep in deps:
+                succ_idx[fill[base + dep]] = base + i
+                fill[base + dep] += 1
+
+    resources_arr = np.asarray(resources, dtype=np.int32)
+    return resources_arr, task_ptr, sizes, succ_ptr, succ_idx, indeg
+
+
+@njit(cache=True)
+def _heap_push(heap, n, key):
+    """Pushes key onto the int64 max-heap heap[:n]; returns the new size."""
+    heap[n] = key
+    i = n
+    n += 1
+    while i > 0:
+        parent = (i - 1) // 2
+        if heap[parent] < heap[i]:
+            heap[parent], heap[i] = heap[i], heap[parent]
+            i = parent
+        else:
+            break
+    return n
+
+
+@njit(cache=True)
+def _heap_pop(heap, n):
+    """Pops the maximum off the int64 max-heap heap[:n]; returns (key, new size)."""
+    top = heap[0]
+    n -= 1
+    heap[0] = heap[n]
+    i = 0
+    while True:
+        left = 2 * i + 1
+        right = left + 1
+        largest = i
+        if left < n and heap[left] > heap[largest]:
+            largest = left
+        if right < n and heap[right] > heap[largest]:
+            largest = right
+        if largest == i:
+            break
+        heap[i], heap[largest] = heap[largest], heap[i]
+        i = largest
+    return top, n
+
+
+@njit(cache=True)
+def greedy_schedule_nb(resources, task_ptr, sizes, succ_ptr, succ_idx, indeg):
+    """
+    Kahn-style greedy scheduler over the flattened instance. All ready tasks
+    sit in a max-heap keyed by (size, then lowest global id), so each pick
+    costs O(log R) instead of a full scan; tasks too big for the remaining
+    capacity are parked until the next slot, since capacity only shrinks
+    within a slot. Returns (count, agents, tasks, slots).
+    """
+    total = task_ptr[-1]
+    num_agents = task_ptr.shape[0] - 1
+
+    agent_of = np.empty(total, dtype=np.int32)
+    for k in range(num_agents):
+        for g in range(task_ptr[k], task_ptr[k + 1]):
+            agent_of[g] = k
+
+    remaining = indeg.copy()
+
+    # Heap keys pack (size, total - g) so the max-heap yields the largest
+    # size first and the smallest global id among equal sizes.
+    heap = np.empty(total, dtype=np.int64)
+    parked = np.empty(total, dtype=np.int64)
+    n = 0
+    for g in range(total):
+        if remaining[g] == 0:
+            n = _heap_push(heap, n, (np.int64(sizes[g]) << 32) | np.int64(total - g))
+
+    out_agent = np.empty(total, dtype=np.int32)
+    out_task = np.empty(total, dtype=np.int32)
+    out_slot = np.empty(total, dtype=np.int32)
+    count = 0
+
+    for t in range(resources.shape[0]):
+        available_capacity = resources[t]
+        num_parked = 0
+        while n > 0:
+            key, n = _heap_pop(heap, n)
+            size = np.int32(key >> 32)
+            if size > available_capacity:
+                parked[num_parked] = key
+                num_parked += 1
+                continue
+            g = total - np.int32(key & 0xFFFFFFFF)
+
+            out_agent[count] = agent_of[g]
+            out_task[count] = g - task_ptr[agent_of[g]]
+            out_slot[count] = t
+            count += 1
+            available_capacity -= size
+
+            for e in range(succ_ptr[g], succ_ptr[g + 1]):
+                succ = succ_idx[e]
+                remaining[succ] -= 1
+                if remaining[succ] == 0:
+                    n = _heap_push(heap, n, (np.int64(sizes[succ]) << 32) | np.int64(total - succ))
+
+        for j in range(num_parked):
+            n = _heap_push(heap, n, parked[j])
+
+    return count, out_agent, out_task, out_slot
+
+
+@njit(cache=True)
+def evaluate_max_cost_nb(sched_agent, sched_slot, num_agents):
+    """
+    Maximum average completion cost over agents for a schedule stored as two
+    parallel arrays (agent id, 0-indexed slot). Slots are 1-indexed in the
+    cost, matching evaluate_max_agent_cost.
+    """
+    agent_sum = np.zeros(num_agents, dtype=np.int64)
+    agent_count = np.zeros(num_agents, dtype=np.int64)
+    for j in range(sched_agent.shape[0]):
+        agent_sum[sched_agent[j]] += sched_slot[j] + 1
+        agent_count[sched_agent[j]] += 1
+
+    best = -1.0
+    for k in range(num_agents):
+        if agent_count[k] == 0:
+            return np.inf
+        cost = agent_sum[k] / agent_count[k]
+        if cost > best:
+            best = cost
+    return best
+
+@njit(cache=True)
+def _topo_rank_nb(total, succ_ptr, succ_idx, indeg):
+    """Kahn topological rank per global task; lower rank never depends on higher."""
+    rank = np.empty(total, dtype=np.int32)
+    remaining = indeg.copy()
+    queue = np.empty(total, dtype=np.int32)
+    qn = 0
+    for g in range(total):
+        if remaining[g] == 0:
+            queue[qn] = g
+            qn += 1
+    head = 0
+    order = 0
+    while head < qn:
+        g = queue[head]
+        head += 1
+        rank[g] = order
+        order += 1
+        for e in range(succ_ptr[g], succ_ptr[g + 1]):
+            s = succ_idx[e]
+            remaining[s] -= 1
+            if remaining[s] == 0:
+                queue[qn] = s
+                qn += 1
+    return rank
+
+
+@njit(cache=True)
+def _resort_slot_nb(slot_items, slot_len, t, rank):
+    """Stable insertion sort of one slot's tasks by topological rank."""
+    for i in range(1, slot_len[t]):
+        g = slot_items[t, i]
+        rg = rank[g]
+        j = i - 1
+        while j >= 0 and rank[slot_items[t, j]] > rg:
+            slot_items[t, j + 1] = slot_items[t, j]
+            j -= 1
+        slot_items[t, j + 1] = g
+
+
+@njit(cache=True)
+def _mix(h, v):
+    """One FNV-style mixing step for move-signature hashes."""
+    return (h * 1099511628211) ^ (v + 40503 + (h << 6) + (h >> 17))
+
+
+@njit(cache=True)
+def _tabu_find(keys, state, h):
+    """Linear-probe lookup; returns the table index of h or -1."""
+    idx = h & (keys.shape[0] - 1)
+    for _ in range(keys.shape[0]):
+        st = state[idx]
+        if st == 0:
+            return -1
+        if st == 1 and keys[idx] == h:
+            return idx
+        idx = (idx + 1) & (keys.shape[0] - 1)
+    return -1
+
+
+@njit(cache=True)
+def _tabu_insert(keys, state, h):
+    idx = h & (keys.shape[0] - 1)
+    for _ in range(keys.shape[0]):
+        if state[idx] != 1:
+            keys[idx] = h
+            state[idx] = 1
+            return
+        idx = (idx + 1) & (keys.shape[0] - 1)
+
+
+@njit(cache=True)
+def _tabu_remember(keys, state, ring, ring_len, ring_head, tombstones, h):
+    """
+    Records h in the short-term memory: the ring buffer keeps insertion
+    order for eviction, the open-addressing table answers membership in
+    O(1). Deletions leave tombstones, so the table is rebuilt from the
+    ring once they accumulate.
+    """
+    cap = ring.shape[0]
+    if ring_len == cap:
+        idx = _tabu_find(keys, state, ring[ring_head])
+        if idx >= 0:
+            state[idx] = 2
+            tombstones += 1
+        ring[ring_head] = h
+        ring_head = (ring_head + 1) % cap
+    else:
+        ring[(ring_head + ring_len) % cap] = h
+        ring_len += 1
+    _tabu_insert(keys, state, h)
+    if tombstones > keys.shape[0] // 2:
+        for idx in range(state.shape[0]):
+            state[idx] = 0
+        tombstones = 0
+        for j in range(ring_len):
+            _tabu_insert(keys, state, ring[(ring_head + j) % cap])
+    return ring_len, ring_head, tombstones
+
+
+@njit(cache=True)
+def _reach_nb(m1, m2, i, s, needed):
+    """Whether sum s is reachable with the first i items using >= needed of them."""
+    if needed >= 2:
+        return m2[i, s] != 0
+    if needed == 1:
+        return m1[i, s] != 0 or m2[i, s] != 0
+    return s == 0 or m1[i, s] != 0 or m2[i, s] != 0
+
+
+@njit(cache=True)
+def _find_group_nb(slot_items, slot_len, t, sizes, target, m1, m2, out_idx):
+    """
+    Subset-sum DP over one slot: finds >= 2 tasks whose sizes sum exactly
+    to target, mirroring find_group_with_sum. m1/m2 track sums reachable
+    with exactly one / at least two of the first i tasks; the backtrack
+    picks randomly among valid include/exclude decisions. Writes the
+    chosen slot indices (descending) into out_idx and returns their count,
+    0 when no group exists.
+    """
+    num = slot_len[t]
+    for s in range(target + 1):
+        m1[0, s] = 0
+        m2[0, s] = 0
+    for i in range(num):
+        sz = sizes[slot_items[t, i]]
+        for s in range(target + 1):
+            v2 = m2[i, s]
+            if s >= sz and (m2[i, s - sz] != 0 or m1[i, s - sz] != 0):
+                v2 = 1
+            m2[i + 1, s] = v2
+            v1 = m1[i, s]
+            if s == sz:
+                v1 = 1
+            m1[i + 1, s] = v1
+    if m2[num, target] == 0:
+        return 0
+
+    s = target
+    needed = 2
+    count = 0
+    for i in range(num, 0, -1):
+        sz = sizes[slot_items[t, i - 1]]
+        exclude_ok = _reach_nb(m1, m2, i - 1, s, needed)
+        include_ok = False
+        if s >= sz:
+            nn = needed - 1 if needed > 0 else 0
+            include_ok = _reach_nb(m1, m2, i - 1, s - sz, nn)
+        if include_ok and (not exclude_ok or np.random.random() < 0.5):
+            out_idx[count] = i - 1
+            count += 1
+            s -= sz
+            if needed > 0:
+                needed -= 1
+    return count
+
+
+@njit(cache=True)
+def search_core_nb(resources, task_ptr, sizes, succ_ptr, succ_idx, indeg,
+                   slot_init, seed, max_iter, candidate_moves,
+                   anneal, initial_temperature, adaptive):
+    """
+    Native move loop shared by local_search (anneal=False) and
+    simulated_annealing (anneal=True) over a complete initial placement
+    slot_init[g]. Mirrors the pure-Python loop: swap / relocate /
+    multi-swap candidates, a 256-entry tabu of recent move signatures,
+    incremental feasibility and cost evaluation, greedy acceptance or
+    Metropolis acceptance under the Modified-Lam temperature control.
+    With adaptive=False the temperature stays fixed at
+    initial_temperature, as needed for replica-exchange segments.
+    Returns (agents, tasks, slots) of the best schedule found, laid out
+    in topological rank order within each slot.
+    """
+    np.random.seed(seed)
+    num_slots = resources.shape[0]
+    total = task_ptr[-1]
+    K = task_ptr.shape[0] - 1
+
+    agent_of = np.empty(total, dtype=np.int32)
+    for k in range(K):
+        for g in range(task_ptr[k], task_ptr[k + 1]):
+            agent_of[g] = k
+
+    # Predecessor CSR, mirrored from the successor CSR.
+    pred_ptr = np.zeros(total + 1, dtype=np.int32)
+    for g in range(total):
+        pred_ptr[g + 1] = pred_ptr[g] + indeg[g]
+    pred_idx = np.empty(pred_ptr[total], dtype=np.int32)
+    fill = pred_ptr[:total].copy()
+    for g in range(total):
+        for e in range(succ_ptr[g], succ_ptr[g + 1]):
+            s = succ_idx[e]
+            pred_idx[fill[s]] = g
+            fill[s] += 1
+
+    rank = _topo_rank_nb(total, succ_ptr, succ_idx, indeg)
+
+    # Schedule state: per-slot task lists plus committed slot/position per
+    # task, with cached slot loads and per-agent completion sums.
+    slot_items = np.empty((num_slots, total), dtype=np.int32)
+    slot_len = np.zeros(num_slots, dtype=np.int32)
+    cur_slot = np.empty(total, dtype=np.int32)
+    pos = np.empty(total, dtype=np.int32)
+    slot_load = np.zeros(num_slots, dtype=np.int32)
+    agent_sum = np.zeros(K, dtype=np.int64)
+    agent_count = np.zeros(K, dtype=np.int64)
+    for g in range(total):
+        t = slot_init[g]
+        cur_slot[g] = t
+        slot_items[t, slot_len[t]] = g
+        slot_len[t] += 1
+        slot_load[t] += sizes[g]
+        agent_sum[agent_of[g]] += t + 1
+        agent_count[agent_of[g]] += 1
+    for t in range(num_slots):
+        _resort_slot_nb(slot_items, slot_len, t, rank)
+        for i in range(slot_len[t]):
+            pos[slot_items[t, i]] = i
+
+    best_cost = -1.0
+    for k in range(K):
+        c = agent_sum[k] / agent_count[k]
+        if c > best_cost:
+            best_cost = c
+    current_cost = best_cost
+    best_slot = cur_slot.copy()
+
+    # Candidate layouts of the touched slots are overlaid on the committed
+    # positions; stamp marks which tasks the overlay covers this iteration.
+    stamp = np.zeros(total, dtype=np.int64)
+    ov_slot = np.empty(total, dtype=np.int32)
+    ov_pos = np.empty(total, dtype=np.int32)
+    snap_items = np.empty((2, total), dtype=np.int32)
+    snap_len = np.zeros(2, dtype=np.int32)
+    moved_g = np.empty(total + 1, dtype=np.int32)
+    moved_from = np.empty(total + 1, dtype=np.int32)
+    moved_to = np.empty(total + 1, dtype=np.int32)
+    agent_delta = np.zeros(K, dtype=np.int64)
+    group_idx = np.empty(total, dtype=np.int32)
+
+    max_size = 0
+    for g in range(total):
+        if sizes[g] > max_size:
+            max_size = sizes[g]
+    m1 = np.zeros((total + 1, max_size + 1), dtype=np.uint8)
+    m2 = np.zeros((total + 1, max_size + 1), dtype=np.uint8)
+
+    tabu_keys = np.zeros(1024, dtype=np.int64)
+    tabu_state = np.zeros(1024, dtype=np.uint8)
+    ring = np.zeros(256, dtype=np.int64)
+    ring_len = 0
+    ring_head = 0
+    tombstones = 0
+
+    no_improve = 0
+    Temp = initial_temperature
+    accept_rate = 0.5
+
+    for iteration in range(max_iter):
+        move_choice = np.random.random()
+        nmoved = 0
+        # Touched slots and their load deltas; undo_mode 0 restores a plain
+        # swap, 1 restores full snapshots of both touched slots.
+        t_a = -1
+        t_b = -1
+        delta_a = 0
+        delta_b = 0
+        undo_mode = 0
+        sw_i1 = 0
+        sw_i2 = 0
+        sw_g1 = 0
+        sw_g2 = 0
+
+        # --- 1. One-task swap move ---
+        if move_choice < 0.33:
+            t1 = np.random.randint(0, num_slots)
+            t2 = np.random.randint(0, num_slots)
+            if t1 == t2:
+                continue
+            if slot_len[t1] == 0 or slot_len[t2] == 0:
+                continue
+            i1 = np.random.randint(0, slot_len[t1])
+            i2 = np.random.randint(0, slot_len[t2])
+            g1 = slot_items[t1, i1]
+            g2 = slot_items[t2, i2]
+            h = _mix(_mix(_mix(_mix(_mix(np.int64(1), g1), g2), t1), t2), 0)
+            if _tabu_find(tabu_keys, tabu_state, h) >= 0:
+                continue
+            slot_items[t1, i1] = g2
+            slot_items[t2, i2] = g1
+            sw_i1, sw_i2, sw_g1, sw_g2 = i1, i2, g1, g2
+            t_a, t_b = t1, t2
+            delta_a = sizes[g2] - sizes[g1]
+            delta_b = sizes[g1] - sizes[g2]
+            moved_g[0] = g1
+            moved_from[0] = t1
+            moved_to[0] = t2
+            moved_g[1] = g2
+            moved_from[1] = t2
+            moved_to[1] = t1
+            nmoved = 2
+
+        # --- 2. One-task move (relocation) ---
+        elif move_choice < 0.66:
+            t_from = np.random.randint(1, num_slots)
+            if slot_len[t_from] == 0:
+                continue
+            i = np.random.randint(0, slot_len[t_from])
+            g = slot_items[t_from, i]
+            t_to = np.random.randint(0, t_from)
+            h = _mix(_mix(_mix(_mix(np.int64(2), g), t_from), t_to), 0)
+            if _tabu_find(tabu_keys, tabu_state, h) >= 0:
+                continue
+            undo_mode = 1
+            snap_len[0] = slot_len[t_from]
+            snap_len[1] = slot_len[t_to]
+            for j in range(slot_len[t_from]):
+                snap_items[0, j] = slot_items[t_from, j]
+            for j in range(slot_len[t_to]):
+                snap_items[1, j] = slot_items[t_to, j]
+            slot_items[t_from, i] = slot_items[t_from, slot_len[t_from] - 1]
+            slot_len[t_from] -= 1
+            slot_items[t_to, slot_len[t_to]] = g
+            slot_len[t_to] += 1
+            _resort_slot_nb(slot_items, slot_len, t_from, rank)
+            _resort_slot_nb(slot_items, slot_len, t_to, rank)
+            t_a, t_b = t_from, t_to
+            delta_a = -sizes[g]
+            delta_b = sizes[g]
+            moved_g[0] = g
+            moved_from[0] = t_from
+            moved_to[0] = t_to
+            nmoved = 1
+
+        # --- 3. Multi-swap move: swap one task with a group of tasks ---
+        else:
+            t_from = np.random.randint(0, num_slots)
+            if slot_len[t_from] == 0:
+                continue
+            i_from = np.random.randint(0, slot_len[t_from])
+            g_from = slot_items[t_from, i_from]
+            size_from = sizes[g_from]
+
+            nvalid = 0
+            for t in range(num_slots):
+                if t != t_from and slot_len[t] >= 2:
+                    nvalid += 1
+            if nvalid == 0:
+                continue
+            r = np.random.randint(0, nvalid)
+            t_to = -1
+            for t in range(num_slots):
+                if t != t_from and slot_len[t] >= 2:
+                    if r == 0:
+                        t_to = t
+                        break
+                    r -= 1
+
+            gcount = _find_group_nb(slot_items, slot_len, t_to, sizes,
+                                    size_from, m1, m2, group_idx)
+            if gcount == 0:
+                continue
+
+            # Signature over the sorted member ids so it is independent of
+            # the slot layout the group was found in.
+            h = _mix(_mix(_mix(np.int64(3), g_from), t_from), t_to)
+            lo = 0
+            for _ in range(gcount):
+                best_g = -1
+                for j in range(gcount):
+                    gm = slot_items[t_to, group_idx[j]]
+                    if gm > lo - 1 and (best_g == -1 or gm < best_g):
+                        if gm >= lo:
+                            best_g = gm
+                h = _mix(h, best_g)
+                lo = best_g + 1
+            if _tabu_find(tabu_keys, tabu_state, h) >= 0:
+                continue
+
+            undo_mode = 1
+            snap_len[0] = slot_len[t_from]
+            snap_len[1] = slot_len[t_to]
+            for j in range(slot_len[t_from]):
+                snap_items[0, j] = slot_items[t_from, j]
+            for j in range(slot_len[t_to]):
+                snap_items[1, j] = slot_items[t_to, j]
+
+            # group_idx is descending, so swap-with-last removals are safe.
+            nmoved = 0
+            for j in range(gcount):
+                idx = group_idx[j]
+                gm = slot_items[t_to, idx]
+                slot_items[t_to, idx] = slot_items[t_to, slot_len[t_to] - 1]
+                slot_len[t_to] -= 1
+                slot_items[t_from, slot_len[t_from]] = gm
+                slot_len[t_from] += 1
+                moved_g[nmoved] = gm
+                moved_from[nmoved] = t_to
+                moved_to[nmoved] = t_from
+                nmoved += 1
+            for j in range(slot_len[t_from]):
+                if slot_items[t_from, j] == g_from:
+                    slot_items[t_from, j] = slot_items[t_from, slot_len[t_from] - 1]
+                    slot_len[t_from] -= 1
+                    break
+            slot_items[t_to, slot_len[t_to]] = g_from
+            slot_len[t_to] += 1
+            moved_g[nmoved] = g_from
+            moved_from[nmoved] = t_from
+            moved_to[nmoved] = t_to
+            nmoved += 1
+            _resort_slot_nb(slot_items, slot_len, t_from, rank)
+            _resort_slot_nb(slot_items, slot_len, t_to, rank)
+            t_a, t_b = t_from, t_to
+            # The group matches size_from, so the slot loads do not change.
+
+        # --- Feasibility: capacity of the touched slots, dependency order
+        # around the moved tasks. Candidate positions overlay the committed
+        # ones for the two touched slots only.
+        feasible = (slot_load[t_a] + delta_a <= resources[t_a]
+                    and slot_load[t_b] + delta_b <= resources[t_b])
+        if feasible:
+            it = iteration + 1
+            for j in range(slot_len[t_a]):
+                g = slot_items[t_a, j]
+                stamp[g] = it
+                ov_slot[g] = t_a
+                ov_pos[g] = j
+            for j in range(slot_len[t_b]):
+                g = slot_items[t_b, j]
+                stamp[g] = it
+                ov_slot[g] = t_b
+                ov_pos[g] = j
+            for j in range(nmoved):
+                g = moved_g[j]
+                t_v = ov_slot[g]
+                idx_v = ov_pos[g]
+                for e in range(pred_ptr[g], pred_ptr[g + 1]):
+                    u = pred_idx[e]
+                    if stamp[u] == it:
+                        t_u = ov_slot[u]
+                        idx_u = ov_pos[u]
+                    else:
+                        t_u = cur_slot[u]
+                        idx_u = pos[u]
+                    if t_u > t_v or (t_u == t_v and idx_u >= idx_v):
+                        feasible = False
+                        break
+                if not feasible:
+                    break
+                for e in range(succ_ptr[g], succ_ptr[g + 1]):
+                    w = succ_idx[e]
+                    if stamp[w] == it:
+                        t_w = ov_slot[w]
+                        idx_w = ov_pos[w]
+                    else:
+                        t_w = cur_slot[w]
+                        idx_w = pos[w]
+                    if t_v > t_w or (t_v == t_w and idx_v >= idx_w):
+                        feasible = False
+                        break
+                if not feasible:
+                    break
+
+        if not feasible:
+            if undo_mode == 0:
+                slot_items[t_a, sw_i1] = sw_g1
+                slot_items[t_b, sw_i2] = sw_g2
+            else:
+                slot_len[t_a] = snap_len[0]
+                slot_len[t_b] = snap_len[1]
+                for j in range(snap_len[0]):
+                    slot_items[t_a, j] = snap_items[0, j]
+                for j in range(snap_len[1]):
+                    slot_items[t_b, j] = snap_items[1, j]
+            ring_len, ring_head, tombstones = _tabu_remember(
+                tabu_keys, tabu_state, ring, ring_len, ring_head, tombstones, h)
+            continue
+
+        # Incremental evaluation: only the agents touched by the move changed.
+        for j in range(nmoved):
+            agent_delta[agent_of[moved_g[j]]] += moved_to[j] - moved_from[j]
+        candidate_cost = -1.0
+        for k in range(K):
+            c = (agent_sum[k] + agent_delta[k]) / agent_count[k]
+            if c > candidate_cost:
+                candidate_cost = c
+
+        if anneal:
+            delta = candidate_cost - current_cost
+            accepted = delta < 0.0 or np.random.random() < np.exp(-delta / Temp)
+        else:
+            accepted = candidate_cost < best_cost
+
+        if accepted:
+            current_cost = candidate_cost
+            for k in range(K):
+                agent_sum[k] += agent_delta[k]
+            slot_load[t_a] += delta_a
+            slot_load[t_b] += delta_b
+            for j in range(slot_len[t_a]):
+                g = slot_items[t_a, j]
+                cur_slot[g] = t_a
+                pos[g] = j
+            for j in range(slot_len[t_b]):
+                g = slot_items[t_b, j]
+                cur_slot[g] = t_b
+                pos[g] = j
+            if candidate_cost < best_cost:
+                best_cost = candidate_cost
+                for g in range(total):
+                    best_slot[g] = cur_slot[g]
+                no_improve = 0
+            else:
+                no_improve += 1
+        else:
+            if undo_mode == 0:
+                slot_items[t_a, sw_i1] = sw_g1
+                slot_items[t_b, sw_i2] = sw_g2
+            else:
+                slot_len[t_a] = snap_len[0]
+                slot_len[t_b] = snap_len[1]
+                for j in range(snap_len[0]):
+                    slot_items[t_a, j] = snap_items[0, j]
+                for j in range(snap_len[1]):
+                    slot_items[t_b, j] = snap_items[1, j]
+            no_improve += 1
+        for k in range(K):
+            agent_delta[k] = 0
+        ring_len, ring_head, tombstones = _tabu_remember(
+            tabu_keys, tabu_state, ring, ring_len, ring_head, tombstones, h)
+
+        if anneal and adaptive:
+            # Modified-Lam temperature control, as in the Python loop.
+            accept_rate = 0.998 * accept_rate + 0.002 * (1.0 if accepted else 0.0)
+            frac = iteration / max_iter
+            if frac < 0.15:
+                target_rate = 0.44 + 0.56 * 560.0 ** (-frac / 0.15)
+            elif frac < 0.65:
+                target_rate = 0.44
+            else:
+                target_rate = 0.44 * 440.0 ** (-(frac - 0.65) / 0.35)
+            if accept_rate > target_rate:
+                Temp *= 0.995
+            else:
+                Temp /= 0.995
+
+        if no_improve >= candidate_moves:
+            break
+
+    # Lay the best placement out in topological rank order within slots.
+    for t in range(num_slots):
+        slot_len[t] = 0
+    for g in range(total):
+        t = best_slot[g]
+        slot_items[t, slot_len[t]] = g
+        slot_len[t] += 1
+    out_agent = np.empty(total, dtype=np.int32)
+    out_task = np.empty(total, dtype=np.int32)
+    out_slot = np.empty(total, dtype=np.int32)
+    count = 0
+    for t in range(num_slots):
+        _resort_slot_nb(slot_items, slot_len, t, rank)
+        for j in range(slot_len[t]):
+            g = slot_items[t, j]
+            out_agent[count] = agent_of[g]
+            out_task[count] = g - task_ptr[agent_of[g]]
+            out_slot[count] = t
+            count += 1
+    return out_agent, out_task, out_slot
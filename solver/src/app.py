@@ -1,9 +1,21 @@
+from concurrent.futures import Future, ProcessPoolExecutor
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from heuristic_solver import greedy_schedule, local_search, evaluate_max_agent_cost, simulated_annealing
+from functools import lru_cache
+from heuristic_solver import greedy_schedule, local_search, evaluate_max_agent_cost_np, schedule_to_flat, simulated_annealing
 from ilp_solver import minimize_max_avg_cost
 from pydantic import BaseModel
+import hashlib
 import time
+import uuid
+
+# orjson serializes the large schedule payloads several times faster than the
+# stdlib encoder; fall back to the default JSONResponse when it is missing.
+try:
+    import orjson  # noqa: F401 -- ORJSONResponse needs it at render time
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
 
 class Task(BaseModel):
     id: int
@@ -28,11 +40,21 @@ class HeuristicParams(BaseModel):
 class ScheduleRequest(BaseModel):
     resources: list[Resource]
     agents: list[Agent]
-    parameters: HeuristicParams | None = None 
+    parameters: HeuristicParams | None = None
 
 
 
 def convert_input(request: ScheduleRequest):
+    # The UI tends to submit the same instance to several solvers in a row,
+    # so the converted form is memoized keyed by a blake2b digest of the
+    # serialized request (blake2b hashes large bodies faster than sha256).
+    # Solver parameters are excluded: they do not affect the conversion.
+    body = request.model_dump_json(exclude={"parameters"})
+    return _convert_input_cached(hashlib.blake2b(body.encode()).hexdigest(), body)
+
+@lru_cache(maxsize=64)
+def _convert_input_cached(digest: str, body: str):
+    request = ScheduleRequest.model_validate_json(body)
     resources = [res.size for res in request.resources]
     agent_tasks = [[task.size for task in agent.tasks] for agent in request.agents]
     agent_colors = [agent.color for agent in request.agents]
@@ -41,12 +63,65 @@ def convert_input(request: ScheduleRequest):
     for agent in request.agents:
         agent_deps = []
         for task in agent.tasks:
-            agent_deps.append(set(task.dependencies)) 
+            agent_deps.append(set(task.dependencies))
         dependencies.append(agent_deps)
 
     return resources, agent_tasks, dependencies, agent_colors
 
-app = FastAPI()
+METHOD_LABELS = {
+    "ilp": "ILP",
+    "greedy": "Greedy",
+    "local_search": "Local Search",
+    "simulated_annealing": "Simulated Annealing",
+}
+
+def solve_schedule(method: str, request: ScheduleRequest) -> dict:
+    """
+    Runs one solver end to end and builds the response payload. Shared by
+    the synchronous endpoints and the background-job workers (the function
+    and its arguments are picklable, so it can be shipped to the process
+    pool as-is).
+    """
+    resources, agent_tasks, dependencies, agent_colors = convert_input(request)
+    params = request.parameters or HeuristicParams()
+
+    start_time = time.time()
+    if method == "ilp":
+        solution = minimize_max_avg_cost(resources, agent_tasks, dependencies)
+    elif method == "greedy":
+        solution = greedy_schedule(resources, agent_tasks, dependencies)
+    elif method == "local_search":
+        solution = local_search(
+            resources,
+            agent_tasks,
+            dependencies,
+            max_iter=params.maxIterations,
+            candidate_moves=params.maxMoves,
+        )
+    else:
+        solution = simulated_annealing(
+            resources,
+            agent_tasks,
+            dependencies,
+            max_iter=params.maxIterations,
+            candidate_moves=params.maxMoves,
+            initial_temperature=params.temperature,
+            cooling_rate=params.coolingRate
+        )
+    elapsed_time = time.time() - start_time
+    agents_arr, slots_arr = schedule_to_flat(solution)
+
+    return {
+        "method": METHOD_LABELS[method],
+        "solution": solution,
+        "z": evaluate_max_agent_cost_np(agents_arr, slots_arr, len(agent_tasks)),
+        "time": elapsed_time,
+        "colors": agent_colors,
+        "resources": resources,
+        "tasks": agent_tasks
+    }
+
+app = FastAPI(default_response_class=DefaultResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -56,99 +131,80 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Long solver runs go to a process pool bound once at startup, so they never
+# monopolize the server workers; jobs maps job ids to their futures.
+executor: ProcessPoolExecutor | None = None
+jobs: dict[str, Future] = {}
+
+@app.on_event("startup")
+def start_executor():
+    global executor
+    executor = ProcessPoolExecutor()
+
+@app.on_event("shutdown")
+def stop_executor():
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+@app.post("/api/schedule/jobs/{method}")
+def submit_schedule_job(method: str, request: ScheduleRequest):
+    """Queues a solve on the worker pool and returns immediately with a job id."""
+    if method not in METHOD_LABELS:
+        raise HTTPException(status_code=404, detail=f"Unknown method: {method}")
+    job_id = uuid.uuid4().hex
+    jobs[job_id] = executor.submit(solve_schedule, method, request)
+    return {"job_id": job_id}
+
+@app.get("/api/schedule/status/{job_id}")
+def get_job_status(job_id: str):
+    future = jobs.get(job_id)
+    if future is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    if future.done():
+        status = "failed" if future.exception() else "done"
+    elif future.running():
+        status = "running"
+    else:
+        status = "queued"
+    return {"job_id": job_id, "status": status}
+
+@app.get("/api/schedule/result/{job_id}")
+def get_job_result(job_id: str):
+    future = jobs.get(job_id)
+    if future is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    if not future.done():
+        raise HTTPException(status_code=409, detail="Job still running")
+    del jobs[job_id]
+    exc = future.exception()
+    if exc is not None:
+        raise HTTPException(status_code=500, detail=str(exc))
+    return future.result()
+
 @app.post("/api/schedule/ilp")
 def get_ilp_schedule(request: ScheduleRequest):
     try:
-        resources, agent_tasks, dependencies, agent_colors = convert_input(request)
-        start_time = time.time()
-        solution = minimize_max_avg_cost(resources, agent_tasks, dependencies)
-        elapsed_time = time.time() - start_time
-        return {
-            "method": "ILP",
-            "solution": solution,
-            "z": evaluate_max_agent_cost(solution, len(agent_tasks)),
-            "time": elapsed_time,
-            "colors": agent_colors,
-            "resources" : resources,
-            "tasks": agent_tasks
-        }
+        return solve_schedule("ilp", request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/schedule/greedy")
 def get_greedy_schedule(request: ScheduleRequest):
     try:
-        resources, agent_tasks, dependencies, agent_colors = convert_input(request)
-        start_time = time.time()
-        solution = greedy_schedule(resources, agent_tasks, dependencies)
-        elapsed_time = time.time() - start_time
-
-        return {
-            "method": "Greedy",
-            "solution": solution,
-            "z": evaluate_max_agent_cost(solution, len(agent_tasks)),
-            "time": elapsed_time,
-            "colors": agent_colors,
-            "resources" : resources,
-            "tasks": agent_tasks
-        }
+        return solve_schedule("greedy", request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/schedule/local_search")
 def get_local_search_schedule(request: ScheduleRequest):
     try:
-        resources, agent_tasks, dependencies, agent_colors = convert_input(request)
-        params = request.parameters or HeuristicParams()
-
-        start_time = time.time()
-        solution = local_search(
-            resources, 
-            agent_tasks, 
-            dependencies, 
-            max_iter=params.maxIterations, 
-            candidate_moves=params.maxMoves, 
-        )
-        elapsed_time = time.time() - start_time
-
-        return {
-            "method": "Local Search",
-            "solution": solution,
-            "z": evaluate_max_agent_cost(solution, len(agent_tasks)),
-            "time": elapsed_time,
-            "colors": agent_colors,
-            "resources": resources,
-            "tasks": agent_tasks
-        }
+        return solve_schedule("local_search", request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/schedule/simulated_annealing")
 def get_simulated_annealing_schedule(request: ScheduleRequest):
     try:
-        resources, agent_tasks, dependencies, agent_colors = convert_input(request)
-        params = request.parameters or HeuristicParams()
-
-        start_time = time.time()
-        solution = simulated_annealing(
-            resources, 
-            agent_tasks, 
-            dependencies, 
-            max_iter=params.maxIterations, 
-            candidate_moves=params.maxMoves, 
-            initial_temperature=params.temperature, 
-            cooling_rate=params.coolingRate
-        )
-        elapsed_time = time.time() - start_time
-
-        return {
-            "method": "Simulated Annealing",
-            "solution": solution,
-            "z": evaluate_max_agent_cost(solution, len(agent_tasks)),
-            "time": elapsed_time,
-            "colors": agent_colors,
-            "resources": resources,
-            "tasks": agent_tasks
-        }
+        return solve_schedule("simulated_annealing", request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,44 @@
+"""
+Eagerly compiles the numba kernels into their on-disk cache.
+
+The kernels are declared with cache=True, so each machine pays the LLVM
+compile cost exactly once; afterwards every process (including the pool
+workers spawned by the drivers) loads native code in milliseconds instead
+of JIT-compiling for tens of seconds. Run this after installing or
+upgrading numba, or after editing _kernels.py:
+
+    python compile_solvers.py
+"""
+import time
+
+def main() -> None:
+    start = time.time()
+    import _kernels
+    print(f"import ({time.time() - start:.2f}s)")
+
+    # A tiny instance exercises every kernel with the argument types the
+    # solvers actually pass, which is what keys the compilation cache.
+    resources = [2, 3]
+    agent_tasks = [[1, 1], [2]]
+    dependencies = [[set(), {0}], [set()]]
+    arrays = _kernels.flatten_instance(resources, agent_tasks, dependencies)
+
+    start = time.time()
+    count, out_agent, out_task, out_slot = _kernels.greedy_schedule_nb(*arrays)
+    print(f"greedy_schedule_nb ({time.time() - start:.2f}s)")
+
+    start = time.time()
+    _kernels.evaluate_max_cost_nb(out_agent[:count], out_slot[:count], len(agent_tasks))
+    print(f"evaluate_max_cost_nb ({time.time() - start:.2f}s)")
+
+    start = time.time()
+    resources_arr, task_ptr, sizes, succ_ptr, succ_idx, indeg = arrays
+    slot_init = out_slot[:count].copy()
+    for j in range(count):
+        slot_init[task_ptr[out_agent[j]] + out_task[j]] = out_slot[j]
+    _kernels.search_core_nb(resources_arr, task_ptr, sizes, succ_ptr, succ_idx,
+                            indeg, slot_init, 0, 2, 1, True, 1.0, True)
+    print(f"search_core_nb ({time.time() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
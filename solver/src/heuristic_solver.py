@@ -1,61 +1,175 @@
-import networkx as nx
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import os
 import random
 import math
 
-def create_agents_dag(agent_tasks: list[list[int]], dependencies: list[list[set[int]]]) -> list[nx.DiGraph]:
-    agents_dag = []
+try:
+    import numpy as np
+    _HAVE_NUMPY = True
+except ImportError:
+    _HAVE_NUMPY = False
+
+# Compiled kernels: numba JIT first, then the prebuilt Cython extension
+# (see solver/setup.py), then the pure-Python implementations below.
+try:
+    from _kernels import flatten_instance, greedy_schedule_nb, evaluate_max_cost_nb
+    _HAVE_KERNELS = True
+except ImportError:
+    try:
+        from _ckernels import (flatten_instance,
+                               greedy_schedule_cy as greedy_schedule_nb,
+                               evaluate_max_cost_cy as evaluate_max_cost_nb)
+        _HAVE_KERNELS = True
+    except ImportError:
+        _HAVE_KERNELS = False
+
+# The compiled search loop exists only in the numba module; the Cython
+# fallback covers just the greedy and evaluation kernels.
+try:
+    from _kernels import search_core_nb
+    _HAVE_SEARCH_KERNELS = True
+except ImportError:
+    _HAVE_SEARCH_KERNELS = False
+
+def build_csr(agent_tasks: list[list[int]], dependencies: list[list[set[int]]]) -> tuple[list, list, list, list]:
+    """
+    Builds a flat CSR (compressed sparse row) representation of each agent's
+    dependency DAG. Returns four parallel lists indexed by agent:
+      sizes[k][i]   -- size of task i,
+      succ_ptr[k]   -- offsets into succ_idx[k] (length num_tasks+1),
+      succ_idx[k]   -- successors of task i are succ_idx[k][succ_ptr[k][i]:succ_ptr[k][i+1]],
+      indeg[k][i]   -- number of dependencies of task i.
+    Plain int arrays avoid per-lookup dict hashing in the hot loops.
+    """
+    sizes, succ_ptr, succ_idx, indeg = [], [], [], []
     for i, tasks in enumerate(agent_tasks):
-        agent_dag = nx.DiGraph()
-        # Add tasks as nodes with the size attribute.
-        for idx, size in enumerate(tasks):
-            agent_dag.add_node(idx, size=size)
-        # Add dependency edges.
+        num_tasks = len(tasks)
+        sizes.append(array('i', tasks))
+        indeg.append(array('i', [len(deps) for deps in dependencies[i]]))
+
+        # Count successors of each task, then lay edges out contiguously.
+        succ_count = [0] * num_tasks
+        for deps in dependencies[i]:
+            for dep in deps:
+                succ_count[dep] += 1
+        ptr = array('i', [0] * (num_tasks + 1))
+        for task in range(num_tasks):
+            ptr[task + 1] = ptr[task] + succ_count[task]
+        idx = array('i', [0] * ptr[num_tasks])
+        fill = ptr[:]
         for j, deps in enumerate(dependencies[i]):
             for dep in deps:
-                agent_dag.add_edge(dep, j)
-        agents_dag.append(agent_dag)
-    return agents_dag
+                idx[fill[dep]] = j
+                fill[dep] += 1
+        succ_ptr.append(ptr)
+        succ_idx.append(idx)
+    return sizes, succ_ptr, succ_idx, indeg
 
-def greedy_schedule(resources: list[int], agent_tasks: list[list[int]], dependencies: list[list[set[int]]]) -> list[list[tuple[int, int]]]:
-    agents_dag = create_agents_dag(agent_tasks, dependencies)
+def build_pred_csr(dependencies: list[list[set[int]]]) -> tuple[list, list]:
+    """
+    Per-agent CSR of predecessor lists, the mirror of the successor CSR from
+    build_csr. The dependency DAG never changes during a search run, so this
+    is computed once in the preamble and the hot feasibility check iterates
+    flat int arrays instead of hashing through Python sets.
+    """
+    pred_ptr, pred_idx = [], []
+    for deps_k in dependencies:
+        ptr = array('i', [0] * (len(deps_k) + 1))
+        idx = array('i')
+        for i, deps in enumerate(deps_k):
+            for dep in deps:
+                idx.append(dep)
+            ptr[i + 1] = len(idx)
+        pred_ptr.append(ptr)
+        pred_idx.append(idx)
+    return pred_ptr, pred_idx
 
-    num_agents = len(agents_dag)
+def build_dep_masks(dependencies: list[list[set[int]]]) -> list[list[int]]:
+    """
+    Packs each task's dependency set into a bitmask (bit i set when the
+    agent's task i is a dependency), so readiness tests become a single
+    AND/compare instead of set operations. Plain Python ints are used
+    rather than fixed-width words: they stay correct for agents with more
+    than 64 tasks and still compare and combine in one operation.
+    """
+    return [[sum(1 << dep for dep in deps) for deps in deps_k]
+            for deps_k in dependencies]
+
+def prepare_instance(resources: list[int], agent_tasks: list[list[int]], dependencies: list[list[set[int]]]):
+    """
+    Flattens an instance into the array tuple the compiled kernels consume.
+    The tuple can be passed to the solvers via their arrays argument, so a
+    driver running many configurations on one instance flattens it once
+    instead of once per call. Returns None when no compiled kernels are
+    available (the pure-Python paths build their own representation).
+    """
+    if not _HAVE_KERNELS:
+        return None
+    return flatten_instance(resources, agent_tasks, dependencies)
+
+def greedy_schedule(resources: list[int], agent_tasks: list[list[int]], dependencies: list[list[set[int]]],
+                    arrays: tuple | None = None) -> list[list[tuple[int, int]]]:
+    if _HAVE_KERNELS:
+        if arrays is None:
+            arrays = flatten_instance(resources, agent_tasks, dependencies)
+        count, out_agent, out_task, out_slot = greedy_schedule_nb(*arrays)
+        schedule = [[] for _ in range(len(resources))]
+        for j in range(count):
+            schedule[out_slot[j]].append((int(out_agent[j]), int(out_task[j])))
+        return schedule
+
+    sizes, succ_ptr, succ_idx, indeg = build_csr(agent_tasks, dependencies)
+    dep_masks = build_dep_masks(dependencies)
+
+    num_agents = len(agent_tasks)
     schedule = [[] for _ in range(len(resources))]
 
-    ready = [set() for _ in range(num_agents)]
-    remaining_indegree = [dict() for _ in range(num_agents)]
+    # Readiness runs on bitmasks: done[k] collects the scheduled tasks of
+    # agent k, so "all dependencies placed" is one mask containment test
+    # per successor instead of a counter array. pushed[k] keeps a task from
+    # entering the heap once per completed dependency.
+    done = [0] * num_agents
+    pushed = [0] * num_agents
 
-    for i, dag in enumerate(agents_dag):
-        for node in dag.nodes():
-            indeg = dag.in_degree(node)
-            remaining_indegree[i][node] = indeg
-            if indeg == 0:
-                ready[i].add(node)
+    # Kahn-style construction: all ready tasks live in a single max-heap
+    # keyed by size (ties broken by agent then task id, matching the old
+    # full-scan selection), so each pick is O(log R) instead of O(R).
+    ready_heap = [(-sizes[i][task], i, task)
+                  for i in range(num_agents)
+                  for task in range(len(agent_tasks[i]))
+                  if not dep_masks[i][task]]
+    for _, i, task in ready_heap:
+        pushed[i] |= 1 << task
+    heapq.heapify(ready_heap)
 
     for t, cap in enumerate(resources):
         available_capacity = cap
-        while True:
-            candidate_tasks = []
-            for i in range(num_agents):
-                for task in ready[i]:
-                    task_size = agents_dag[i].nodes[task]['size']
-                    if task_size <= available_capacity:
-                        candidate_tasks.append((i, task, task_size))
-            if not candidate_tasks:
-                break
-
-            # Greedy choice: choose the task with the largest size among candidates.
-            candidate_tasks.sort(key=lambda x: x[2], reverse=True)
-            chosen_agent, chosen_task, chosen_size = candidate_tasks[0]
-
-            schedule[t].append((chosen_agent, chosen_task))
-            available_capacity -= chosen_size
-            ready[chosen_agent].remove(chosen_task)
-
-            for succ in agents_dag[chosen_agent].successors(chosen_task):
-                remaining_indegree[chosen_agent][succ] -= 1
-                if remaining_indegree[chosen_agent][succ] == 0:
-                    ready[chosen_agent].add(succ)
+        too_big = []
+        while ready_heap:
+            neg_size, agent, task = heapq.heappop(ready_heap)
+            if -neg_size > available_capacity:
+                # Capacity only shrinks within a slot, so park the task
+                # until the next slot.
+                too_big.append((neg_size, agent, task))
+                continue
+
+            schedule[t].append((agent, task))
+            available_capacity += neg_size
+            done[agent] |= 1 << task
+
+            ptr = succ_ptr[agent]
+            masks = dep_masks[agent]
+            for succ in succ_idx[agent][ptr[task]:ptr[task + 1]]:
+                bit = 1 << succ
+                if not pushed[agent] & bit and not masks[succ] & ~done[agent]:
+                    pushed[agent] |= bit
+                    heapq.heappush(ready_heap, (-sizes[agent][succ], agent, succ))
+
+        for item in too_big:
+            heapq.heappush(ready_heap, item)
 
     return schedule
 
@@ -66,9 +180,15 @@ def evaluate_max_agent_cost(schedule: list[list[tuple[int, int]]], num_agents: i
       C̄ₖ = (1/Nₖ) * sum_{i in tasks of k} (time_slot at which task i is completed).
     We assume time slots are 1-indexed in the cost calculation.
     """
+    if _HAVE_KERNELS:
+        agents_arr, slots_arr = schedule_to_flat(schedule)
+        return float(evaluate_max_cost_nb(np.asarray(agents_arr, dtype=np.int32),
+                                          np.asarray(slots_arr, dtype=np.int32) - 1,
+                                          num_agents))
+
     agent_costs = [0] * num_agents
     task_counts = [0] * num_agents
-    
+
     for t, tasks in enumerate(schedule, start=1):
         for agent, task in tasks:
             agent_costs[agent] += t
@@ -78,23 +198,108 @@ def evaluate_max_agent_cost(schedule: list[list[tuple[int, int]]], num_agents: i
                  for k in range(num_agents)]
     return max(avg_costs)
 
-def is_feasible(schedule: list[list[tuple[int, int]]], agents_dag: list[nx.DiGraph], resources: list[int]) -> bool:
+def schedule_to_flat(schedule: list[list[tuple[int, int]]]) -> tuple[array, array]:
+    """
+    Flattens a schedule into two parallel arrays over all placed tasks: the
+    agent of each task and its (1-indexed) completion slot.
+    """
+    agents_arr = array('i')
+    slots_arr = array('i')
+    for t, tasks in enumerate(schedule, start=1):
+        for agent, task in tasks:
+            agents_arr.append(agent)
+            slots_arr.append(t)
+    return agents_arr, slots_arr
+
+def evaluate_max_agent_cost_np(agents_arr: array, slots_arr: array, num_agents: int) -> float:
+    """
+    Vectorized evaluate_max_agent_cost over the flattened schedule from
+    schedule_to_flat: two bincounts over contiguous ints replace the
+    interpreted walk of the nested schedule. Falls back to the plain Python
+    reduction when numpy is unavailable.
+    """
+    if not _HAVE_NUMPY:
+        agent_costs = [0] * num_agents
+        task_counts = [0] * num_agents
+        for agent, t in zip(agents_arr, slots_arr):
+            agent_costs[agent] += t
+            task_counts[agent] += 1
+        return max((agent_costs[k] / task_counts[k]) if task_counts[k] > 0 else float('inf')
+                   for k in range(num_agents))
+
+    agents = np.asarray(agents_arr, dtype=np.int32)
+    slots = np.asarray(slots_arr, dtype=np.int32)
+    agent_costs = np.bincount(agents, weights=slots, minlength=num_agents)
+    task_counts = np.bincount(agents, minlength=num_agents)
+    if (task_counts == 0).any():
+        return float('inf')
+    return float((agent_costs / task_counts).max())
+
+def schedule_to_soa(schedule: list[list[tuple[int, int]]]) -> tuple[list[array], list[array]]:
+    """
+    Splits a schedule into two parallel int arrays per slot: agent_of[t][i]
+    and task_of[t][i]. The search loops operate on this structure-of-arrays
+    form, where a swap is four int reads and four int writes with no tuple
+    allocation.
+    """
+    agent_of = [array('i', (agent for agent, task in tasks)) for tasks in schedule]
+    task_of = [array('i', (task for agent, task in tasks)) for tasks in schedule]
+    return agent_of, task_of
+
+def soa_to_schedule(agent_of: list[array], task_of: list[array]) -> list[list[tuple[int, int]]]:
+    """Rebuilds the list-of-tuples schedule from the per-slot parallel arrays."""
+    return [[(agent_of[t][i], task_of[t][i]) for i in range(len(agent_of[t]))]
+            for t in range(len(agent_of))]
+
+def compute_agent_sums(agent_of: list[array], task_of: list[array], num_agents: int) -> tuple[list[int], list[int]]:
+    """
+    Computes, for each agent, the sum of the (1-indexed) completion slots of its
+    tasks and the number of scheduled tasks. These two arrays are enough to
+    derive the maximum average cost, and they can be updated incrementally when
+    a move only relocates a few tasks between slots.
+    """
+    agent_sum = [0] * num_agents
+    agent_count = [0] * num_agents
+    for t in range(len(agent_of)):
+        for agent in agent_of[t]:
+            agent_sum[agent] += t + 1
+            agent_count[agent] += 1
+    return agent_sum, agent_count
+
+def max_avg_cost_with_delta(agent_sum: list[int], agent_count: list[int], slot_delta: dict[int, int]) -> float:
+    """
+    Maximum average cost over agents, with the per-agent slot-sum deltas of a
+    candidate move applied on the fly. O(K) instead of re-walking the schedule.
+    """
+    best = float('-inf')
+    for k in range(len(agent_sum)):
+        if agent_count[k] == 0:
+            return float('inf')
+        cost = (agent_sum[k] + slot_delta.get(k, 0)) / agent_count[k]
+        if cost > best:
+            best = cost
+    return best
+
+def is_feasible(schedule: list[list[tuple[int, int]]], csr: tuple[list, list, list, list], resources: list[int]) -> bool:
     """
     Checks two types of feasibility:
       1. Capacity: In each time slot, the sum of task sizes must not exceed the resource capacity.
       2. Dependencies: For each agent, if task u must precede task v then u must be scheduled before v.
          We use the order in the schedule (time slot index and position in the slot) to check this.
     """
+    sizes, succ_ptr, succ_idx, indeg = csr
+    num_agents = len(sizes)
+
     # Check capacity constraints.
     for t, tasks in enumerate(schedule):
         total = 0
         for agent, task in tasks:
-            total += agents_dag[agent].nodes[task]['size']
+            total += sizes[agent][task]
         if total > resources[t]:
             return False
 
     # Build a mapping for each agent: task -> (time_slot, order_in_slot)
-    agent_positions = {agent: {} for agent in range(len(agents_dag))}
+    agent_positions = {agent: {} for agent in range(num_agents)}
     for t, tasks in enumerate(schedule):
         for idx, (agent, task) in enumerate(tasks):
             # Each task should appear only once.
@@ -102,145 +307,454 @@ def is_feasible(schedule: list[list[tuple[int, int]]], agents_dag: list[nx.DiGra
                 return False
             agent_positions[agent][task] = (t, idx)
 
-    # Check dependency ordering.
-    for agent, dag in enumerate(agents_dag):
-        for u, v in dag.edges():
-            if u not in agent_positions[agent] or v not in agent_positions[agent]:
-                # A task not scheduled implies infeasibility.
-                return False
-            t_u, idx_u = agent_positions[agent][u]
-            t_v, idx_v = agent_positions[agent][v]
-            # We require that u is scheduled before v.
+    # Check dependency ordering along the CSR successor lists.
+    for agent in range(num_agents):
+        ptr = succ_ptr[agent]
+        for u in range(len(sizes[agent])):
+            for v in succ_idx[agent][ptr[u]:ptr[u + 1]]:
+                if u not in agent_positions[agent] or v not in agent_positions[agent]:
+                    # A task not scheduled implies infeasibility.
+                    return False
+                t_u, idx_u = agent_positions[agent][u]
+                t_v, idx_v = agent_positions[agent][v]
+                # We require that u is scheduled before v.
+                if t_u > t_v or (t_u == t_v and idx_u >= idx_v):
+                    return False
+
+    return True
+
+def compute_slot_loads(agent_of: list[array], task_of: list[array], sizes: list) -> array:
+    """Total size scheduled in each time slot."""
+    slot_load = array('i', [0] * len(agent_of))
+    for t in range(len(agent_of)):
+        for idx in range(len(agent_of[t])):
+            slot_load[t] += sizes[agent_of[t][idx]][task_of[t][idx]]
+    return slot_load
+
+def compute_positions(agent_of: list[array], task_of: list[array]) -> dict[tuple[int, int], tuple[int, int]]:
+    """Maps (agent, task) -> (time_slot, order_in_slot) for every scheduled task."""
+    pos = {}
+    for t in range(len(agent_of)):
+        for idx in range(len(agent_of[t])):
+            pos[(agent_of[t][idx], task_of[t][idx])] = (t, idx)
+    return pos
+
+def move_is_feasible(agent_of: list[array], task_of: list[array],
+                     csr: tuple[list, list, list, list],
+                     pred_csr: tuple[list, list],
+                     resources: list[int],
+                     slot_load: array,
+                     pos: dict[tuple[int, int], tuple[int, int]],
+                     touched_slots: tuple[int, int],
+                     load_delta: dict[int, int],
+                     moved: list[tuple[int, int, int, int]]) -> bool:
+    """
+    Feasibility check restricted to what a move can actually break: the
+    capacity of the touched slots (via the cached slot loads plus the move's
+    deltas) and the dependency ordering around the relocated tasks. Untouched
+    slots and edges between unmoved tasks cannot become infeasible, so the
+    check is O(touched slot sizes + degree of the moved tasks) instead of a
+    full O(N + E) re-walk of the schedule.
+    """
+    sizes, succ_ptr, succ_idx, indeg = csr
+    pred_ptr, pred_idx = pred_csr
+
+    # Capacity of the touched slots.
+    for t in touched_slots:
+        if slot_load[t] + load_delta.get(t, 0) > resources[t]:
+            return False
+
+    # Positions inside the touched slots reflect the candidate layout; every
+    # other task kept the position cached in pos.
+    local_pos = {}
+    for t in touched_slots:
+        for idx in range(len(agent_of[t])):
+            local_pos[(agent_of[t][idx], task_of[t][idx])] = (t, idx)
+
+    for agent, task, t_old, t_new in moved:
+        t_v, idx_v = local_pos[(agent, task)]
+        for u in pred_idx[agent][pred_ptr[agent][task]:pred_ptr[agent][task + 1]]:
+            key = (agent, u)
+            t_u, idx_u = local_pos.get(key) or pos[key]
             if t_u > t_v or (t_u == t_v and idx_u >= idx_v):
                 return False
+        ptr = succ_ptr[agent]
+        for w in succ_idx[agent][ptr[task]:ptr[task + 1]]:
+            key = (agent, w)
+            t_w, idx_w = local_pos.get(key) or pos[key]
+            if t_v > t_w or (t_v == t_w and idx_v >= idx_w):
+                return False
 
     return True
 
+def find_group_with_sum(slot_agents: array, slot_tasks: array, sizes: list, target: int,
+                        rng: random.Random = random) -> list[int] | None:
+    """
+    Finds a group of at least two tasks in a slot whose sizes sum exactly to
+    target, via a subset-sum DP over Python-int bitmasks (bit s of a mask is
+    set iff sum s is achievable). Returns the indices into the slot arrays,
+    or None when no such group exists. The backward reconstruction picks
+    randomly among the valid include/exclude decisions, so repeated calls
+    explore different matching groups.
+    """
+    limit = (1 << (target + 1)) - 1  # sums above target are never useful
+    num_tasks = len(slot_tasks)
+    # mask1[i]/mask2[i]: sums achievable with exactly one / at least two of
+    # the first i tasks.
+    mask1 = [0] * (num_tasks + 1)
+    mask2 = [0] * (num_tasks + 1)
+    for i in range(num_tasks):
+        size = sizes[slot_agents[i]][slot_tasks[i]]
+        mask2[i + 1] = (mask2[i] | (mask2[i] << size) | (mask1[i] << size)) & limit
+        mask1[i + 1] = (mask1[i] | (1 << size)) & limit
+    if not (mask2[num_tasks] >> target) & 1:
+        return None
+
+    group = []
+    s = target
+    needed = 2  # tasks still required (2 means "at least two")
+    for i in range(num_tasks, 0, -1):
+        if needed == 0:
+            break
+        size = sizes[slot_agents[i - 1]][slot_tasks[i - 1]]
+        options = []
+        if needed == 2:
+            if (mask2[i - 1] >> s) & 1:
+                options.append((False, 2))
+            if size <= s and (mask2[i - 1] >> (s - size)) & 1:
+                options.append((True, 2))
+            if size <= s and (mask1[i - 1] >> (s - size)) & 1:
+                options.append((True, 1))
+        else:  # needed == 1
+            if (mask1[i - 1] >> s) & 1:
+                options.append((False, 1))
+            if size == s:
+                options.append((True, 0))
+        include, needed = rng.choice(options)
+        if include:
+            group.append(i - 1)
+            s -= size
+    return group
+
+def build_topo_rank(csr: tuple[list, list, list, list]) -> list[array]:
+    """
+    Per-agent topological rank of every task, via Kahn's algorithm on the
+    CSR. Computed once per search run; slots touched by a multi-swap are
+    laid out in rank order, which keeps same-agent dependent tasks ordered
+    within a slot without tracking exact insert positions.
+    """
+    _, succ_ptr, succ_idx, indeg = csr
+    topo_rank = []
+    for k in range(len(indeg)):
+        remaining = array('i', indeg[k])
+        order = [i for i in range(len(remaining)) if remaining[i] == 0]
+        for u in order:
+            for v in succ_idx[k][succ_ptr[k][u]:succ_ptr[k][u + 1]]:
+                remaining[v] -= 1
+                if remaining[v] == 0:
+                    order.append(v)
+        rank = array('i', [0] * len(remaining))
+        for r, u in enumerate(order):
+            rank[u] = r
+        topo_rank.append(rank)
+    return topo_rank
+
+def resort_slot_by_rank(slot_agents: array, slot_tasks: array, topo_rank: list[array]) -> None:
+    """Rewrites one slot in topological rank order (in place)."""
+    pairs = sorted(zip(slot_agents, slot_tasks),
+                   key=lambda pair: topo_rank[pair[0]][pair[1]])
+    for i, (agent, task) in enumerate(pairs):
+        slot_agents[i] = agent
+        slot_tasks[i] = task
+
+def undo_move(agent_of: list[array], task_of: list[array], undo: tuple) -> None:
+    """Reverts an in-place move using the patch recorded when it was applied."""
+    op = undo[0]
+    if op == 'swap':
+        _, t1, idx1, t2, idx2 = undo
+        agent_of[t1][idx1], agent_of[t2][idx2] = agent_of[t2][idx2], agent_of[t1][idx1]
+        task_of[t1][idx1], task_of[t2][idx2] = task_of[t2][idx2], task_of[t1][idx1]
+    elif op == 'relocate':
+        _, t_from, idx, t_to, insert_idx = undo
+        agent = agent_of[t_to].pop(insert_idx)
+        task = task_of[t_to].pop(insert_idx)
+        agent_of[t_from].insert(idx, agent)
+        task_of[t_from].insert(idx, task)
+    else:  # 'slots': restore the saved contents of the two touched slots
+        _, t_a, saved_a, t_b, saved_b = undo
+        agent_of[t_a], task_of[t_a] = saved_a
+        agent_of[t_b], task_of[t_b] = saved_b
+
+def _run_search_core(resources: list[int], agent_tasks: list[list[int]],
+                     dependencies: list[list[set[int]]],
+                     schedule: list[list[tuple[int, int]]],
+                     max_iter: int, candidate_moves: int, seed: int | None,
+                     anneal: bool, initial_temperature: float,
+                     adaptive: bool = True,
+                     arrays: tuple | None = None) -> list[list[tuple[int, int]]] | None:
+    """
+    Runs the compiled search loop when it applies: the numba kernels are
+    importable, every agent has at least one task and the greedy schedule
+    placed all of them. Returns the improved schedule, or None when the
+    caller should run the pure-Python loop instead. The compiled loop draws
+    from numpy's RNG, so for a given seed its results differ from the
+    Python loop's, but both are deterministic.
+    """
+    if not _HAVE_SEARCH_KERNELS:
+        return None
+    if any(len(tasks) == 0 for tasks in agent_tasks):
+        return None
+    total = sum(len(tasks) for tasks in agent_tasks)
+    if sum(len(slot) for slot in schedule) != total:
+        return None
+
+    if arrays is None:
+        arrays = flatten_instance(resources, agent_tasks, dependencies)
+    resources_arr, task_ptr, sizes, succ_ptr, succ_idx, indeg = arrays
+    slot_init = np.empty(total, dtype=np.int32)
+    for t, slot in enumerate(schedule):
+        for k, i in slot:
+            slot_init[task_ptr[k] + i] = t
+    if seed is None:
+        seed = random.randrange(2**31)
+
+    out_agent, out_task, out_slot = search_core_nb(
+        resources_arr, task_ptr, sizes, succ_ptr, succ_idx, indeg,
+        slot_init, seed, max_iter, candidate_moves, anneal, initial_temperature,
+        adaptive)
+    improved = [[] for _ in range(len(resources))]
+    for j in range(total):
+        improved[int(out_slot[j])].append((int(out_agent[j]), int(out_task[j])))
+    return improved
+
 def local_search(resources: list[int], agent_tasks: list[list[int]], dependencies: list[list[set[int]]],
                  max_iter: int = 100000,
                  candidate_moves: int = 500,
-                 seed: int | None = None) -> list[list[tuple[int, int]]]:
+                 seed: int | None = None,
+                 initial_schedule: list[list[tuple[int, int]]] | None = None,
+                 arrays: tuple | None = None) -> list[list[tuple[int, int]]]:
     """
     Uses a heuristic local search to improve the schedule.
     The objective is to minimize the maximum average cost among agents.
     In each iteration, we generate candidate modifications (swaps or moves) and accept
     the best candidate that is feasible. We continue until no improvement is seen
     in a given number of consecutive candidate moves.
+
+    initial_schedule, when given, is improved instead of a fresh greedy
+    schedule; callers running several searches on the same instance can
+    compute the greedy seed once and share it. It is not mutated. arrays,
+    when given, is the tuple from prepare_instance for this instance.
     """
-    schedule = greedy_schedule(resources, agent_tasks, dependencies)
-    agents_dag = create_agents_dag(agent_tasks, dependencies)
-    num_agents = len(agents_dag)
-    best_schedule = [row[:] for row in schedule]
-    best_cost = evaluate_max_agent_cost(best_schedule, num_agents)
-    
+    if initial_schedule is not None:
+        schedule = initial_schedule
+    else:
+        schedule = greedy_schedule(resources, agent_tasks, dependencies, arrays=arrays)
+    improved = _run_search_core(resources, agent_tasks, dependencies, schedule,
+                                max_iter, candidate_moves, seed, False, 1.0,
+                                arrays=arrays)
+    if improved is not None:
+        return improved
+    csr = build_csr(agent_tasks, dependencies)
+    pred_csr = build_pred_csr(dependencies)
+    topo_rank = build_topo_rank(csr)
+    sizes = csr[0]
+    num_agents = len(agent_tasks)
+    agent_of, task_of = schedule_to_soa(schedule)
+    agent_sum, agent_count = compute_agent_sums(agent_of, task_of, num_agents)
+    best_cost = max_avg_cost_with_delta(agent_sum, agent_count, {})
+
+    # Cached invariants, updated incrementally on every accepted move.
+    slot_load = compute_slot_loads(agent_of, task_of, sizes)
+    pos = compute_positions(agent_of, task_of)
+    _, succ_ptr, _, indeg = csr
+    for k in range(num_agents):
+        for i in range(len(agent_tasks[k])):
+            if (indeg[k][i] > 0 or succ_ptr[k][i + 1] > succ_ptr[k][i]) and (k, i) not in pos:
+                # An unscheduled task with dependency edges makes every
+                # candidate infeasible, so no move can ever be accepted.
+                return schedule
+
     no_improve_count = 0
 
-    random.seed(seed)
+    # Draws come from a local Random instance: nothing global gets reseeded,
+    # and binding the methods to locals avoids a module attribute lookup on
+    # every draw in the hot loop.
+    rng = random.Random(seed)
+    rand, randint, choice = rng.random, rng.randint, rng.choice
+
+    # Short-term memory of recently tried move signatures: re-sampling a
+    # just-tried move would only repeat its feasibility check and
+    # evaluation, so such candidates are skipped before any state is
+    # touched. Accepted moves are remembered too, which keeps the reverse
+    # move from immediately ping-ponging back.
+    tabu = deque(maxlen=256)
+    tabu_set = set()
+
+    def remember_move(sig):
+        if len(tabu) == tabu.maxlen:
+            tabu_set.discard(tabu[0])
+        tabu.append(sig)
+        tabu_set.add(sig)
 
     for _ in range(max_iter):
-        # Make a copy of the current best schedule.
-        candidate_schedule = [row[:] for row in best_schedule]
+        # Moves are applied to the schedule in place and undone on rejection,
+        # so no per-iteration copy of the schedule is needed.
+        move_choice = rand()
+        # Tasks relocated by the move, as (agent, task, old_slot, new_slot)
+        # with 1-indexed slots, plus the touched slots and their load deltas;
+        # used for the incremental evaluation and feasibility check.
+        moved = []
 
-        move_choice = random.random()
-        
         # --- 1. One-task swap move ---
         if move_choice < 0.33:
             # Choose two time slots at random.
-            t1 = random.randint(0, len(candidate_schedule)-1)
-            t2 = random.randint(0, len(candidate_schedule)-1)
+            t1 = randint(0, len(agent_of)-1)
+            t2 = randint(0, len(agent_of)-1)
             if t1 == t2:
                 continue
-            
+
             # Swap one task from t1 with one task from t2.
-            if candidate_schedule[t1] and candidate_schedule[t2]:
-                idx1 = random.randint(0, len(candidate_schedule[t1]) - 1)
-                idx2 = random.randint(0, len(candidate_schedule[t2]) - 1)
-                candidate_schedule[t1][idx1], candidate_schedule[t2][idx2] = (
-                    candidate_schedule[t2][idx2], candidate_schedule[t1][idx1])
+            if agent_of[t1] and agent_of[t2]:
+                idx1 = randint(0, len(agent_of[t1]) - 1)
+                idx2 = randint(0, len(agent_of[t2]) - 1)
+                agent1, task1 = agent_of[t1][idx1], task_of[t1][idx1]
+                agent2, task2 = agent_of[t2][idx2], task_of[t2][idx2]
+                sig = ('swap', agent1, task1, agent2, task2, t1, t2)
+                if sig in tabu_set:
+                    continue
+                agent_of[t1][idx1], task_of[t1][idx1] = agent2, task2
+                agent_of[t2][idx2], task_of[t2][idx2] = agent1, task1
+                undo = ('swap', t1, idx1, t2, idx2)
+                moved.append((agent1, task1, t1+1, t2+1))
+                moved.append((agent2, task2, t2+1, t1+1))
+                size1 = sizes[agent1][task1]
+                size2 = sizes[agent2][task2]
+                touched = (t1, t2)
+                load_delta = {t1: size2 - size1, t2: size1 - size2}
             else:
                 continue
-        
+
         # --- 2. One-task move (relocation) ---
         elif move_choice < 0.66:
             # Move a task from a later time slot to an earlier one.
-            t_from = random.randint(1, len(candidate_schedule)-1)
-            if not candidate_schedule[t_from]:
+            t_from = randint(1, len(agent_of)-1)
+            if not agent_of[t_from]:
+                continue
+            idx = randint(0, len(agent_of[t_from]) - 1)
+            agent, task = agent_of[t_from][idx], task_of[t_from][idx]
+            t_to = randint(0, t_from-1)
+            sig = ('relocate', agent, task, t_from, t_to)
+            if sig in tabu_set:
                 continue
-            idx = random.randint(0, len(candidate_schedule[t_from]) - 1)
-            task = candidate_schedule[t_from].pop(idx)
-            t_to = random.randint(0, t_from-1)
-            insert_idx = random.randint(0, len(candidate_schedule[t_to]))
-            candidate_schedule[t_to].insert(insert_idx, task)
-        
+            agent_of[t_from].pop(idx)
+            task_of[t_from].pop(idx)
+            insert_idx = randint(0, len(agent_of[t_to]))
+            agent_of[t_to].insert(insert_idx, agent)
+            task_of[t_to].insert(insert_idx, task)
+            undo = ('relocate', t_from, idx, t_to, insert_idx)
+            moved.append((agent, task, t_from+1, t_to+1))
+            task_size = sizes[agent][task]
+            touched = (t_from, t_to)
+            load_delta = {t_from: -task_size, t_to: task_size}
+
         # --- 3. Multi-swap move: swap one task with a group of tasks ---
         else:
             # Select a time slot with at least one task.
-            t_from = random.randint(0, len(candidate_schedule)-1)
-            if not candidate_schedule[t_from]:
+            t_from = randint(0, len(agent_of)-1)
+            if not agent_of[t_from]:
                 continue
-            idx_from = random.randint(0, len(candidate_schedule[t_from]) - 1)
-            task_from = candidate_schedule[t_from][idx_from]
-            agent_from, task_id_from = task_from
-            size_from = agents_dag[agent_from].nodes[task_id_from]['size']
-            
+            idx_from = randint(0, len(agent_of[t_from]) - 1)
+            agent_from = agent_of[t_from][idx_from]
+            task_id_from = task_of[t_from][idx_from]
+            size_from = sizes[agent_from][task_id_from]
+
             # Choose a different time slot that has at least 2 tasks.
-            valid_slots = [t for t in range(len(candidate_schedule)) 
-                        if t != t_from and len(candidate_schedule[t]) >= 2]
+            valid_slots = [t for t in range(len(agent_of))
+                        if t != t_from and len(agent_of[t]) >= 2]
             if not valid_slots:
                 continue
-            t_to = random.choice(valid_slots)
-            tasks_in_t_to = candidate_schedule[t_to]
-            
-            # Try to find a group of at least 2 tasks in t_to whose sizes sum to size_from.
-            found_group = None
-            for _ in range(50):  # try up to 50 random groups
-                # Randomly choose a group size between 2 and all tasks in t_to.
-                group_size = random.randint(2, len(tasks_in_t_to))
-                candidate_indices = random.sample(range(len(tasks_in_t_to)), group_size)
-                total_size = 0
-                for idx in candidate_indices:
-                    agent, task_id = tasks_in_t_to[idx]
-                    total_size += agents_dag[agent].nodes[task_id]['size']
-                if total_size == size_from:
-                    found_group = candidate_indices
-                    break
+            t_to = choice(valid_slots)
+
+            # Find a group of at least 2 tasks in t_to whose sizes sum to
+            # size_from. The subset-sum DP answers exactly, so the move is
+            # only skipped when no matching group exists at all.
+            found_group = find_group_with_sum(agent_of[t_to], task_of[t_to], sizes, size_from, rng)
             if found_group is None:
-                continue  # no matching group found; skip this move
-            
-            # Perform the swap: remove the chosen task from t_from and the group from t_to,
-            # then swap them.
-            group_tasks = [candidate_schedule[t_to][i] for i in sorted(found_group, reverse=True)]
+                continue  # no matching group exists; skip this move
+
+            group = [(agent_of[t_to][i], task_of[t_to][i]) for i in sorted(found_group, reverse=True)]
+            sig = ('multi', agent_from, task_id_from, t_from, t_to, tuple(group))
+            if sig in tabu_set:
+                continue
+
+            # Perform the swap: remove the chosen task from t_from and the
+            # group from t_to via swap-with-last (O(1) per removal instead of
+            # an O(slot) memmove per pop), append the replacements, then lay
+            # both slots out in topological rank order. Reconstructing exact
+            # positions on rejection is fiddly, so the undo patch keeps a
+            # copy of the two touched slots instead.
+            undo = ('slots', t_from, (agent_of[t_from][:], task_of[t_from][:]),
+                    t_to, (agent_of[t_to][:], task_of[t_to][:]))
             for i in sorted(found_group, reverse=True):
-                candidate_schedule[t_to].pop(i)
-            candidate_schedule[t_from].pop(idx_from)
-            # Insert the group tasks into t_from at the former position.
-            for task in group_tasks:
-                candidate_schedule[t_from].insert(idx_from, task)
-            # Insert the single task into t_to at a random position.
-            insert_idx = random.randint(0, len(candidate_schedule[t_to]))
-            candidate_schedule[t_to].insert(insert_idx, task_from)
-
-        
+                agent_of[t_to][i] = agent_of[t_to][-1]
+                task_of[t_to][i] = task_of[t_to][-1]
+                agent_of[t_to].pop()
+                task_of[t_to].pop()
+            agent_of[t_from][idx_from] = agent_of[t_from][-1]
+            task_of[t_from][idx_from] = task_of[t_from][-1]
+            agent_of[t_from].pop()
+            task_of[t_from].pop()
+            for agent, task in group:
+                agent_of[t_from].append(agent)
+                task_of[t_from].append(task)
+                moved.append((agent, task, t_to+1, t_from+1))
+            agent_of[t_to].append(agent_from)
+            task_of[t_to].append(task_id_from)
+            moved.append((agent_from, task_id_from, t_from+1, t_to+1))
+            # A rank-sorted slot is canonical: within a slot only the order
+            # of same-agent dependent tasks matters, and topological order
+            # never blocks an otherwise feasible move.
+            resort_slot_by_rank(agent_of[t_from], task_of[t_from], topo_rank)
+            resort_slot_by_rank(agent_of[t_to], task_of[t_to], topo_rank)
+            # The group matches size_from, so the slot loads do not change.
+            touched = (t_from, t_to)
+            load_delta = {}
+
+
         # Only consider candidates that are feasible.
-        if not is_feasible(candidate_schedule, agents_dag, resources):
+        if not move_is_feasible(agent_of, task_of, csr, pred_csr, resources,
+                                slot_load, pos, touched, load_delta, moved):
+            undo_move(agent_of, task_of, undo)
+            remember_move(sig)
             continue
-        
-        candidate_cost = evaluate_max_agent_cost(candidate_schedule, num_agents)
-        
+
+        # Incremental evaluation: only the agents touched by the move changed.
+        slot_delta = {}
+        for agent, task, t_old, t_new in moved:
+            slot_delta[agent] = slot_delta.get(agent, 0) + (t_new - t_old)
+        candidate_cost = max_avg_cost_with_delta(agent_sum, agent_count, slot_delta)
+
         # Accept the candidate if it improves the maximum agent cost.
         if candidate_cost < best_cost:
-            best_schedule = candidate_schedule
             best_cost = candidate_cost
+            for agent, delta in slot_delta.items():
+                agent_sum[agent] += delta
+            for t in touched:
+                slot_load[t] += load_delta.get(t, 0)
+                for idx in range(len(agent_of[t])):
+                    pos[(agent_of[t][idx], task_of[t][idx])] = (t, idx)
             no_improve_count = 0
         else:
+            undo_move(agent_of, task_of, undo)
             no_improve_count += 1
-        
+        remember_move(sig)
+
         # Stop if no improvement has been found for a while.
         if no_improve_count >= candidate_moves:
             break
 
-    return best_schedule
-    
+    return soa_to_schedule(agent_of, task_of)
+
 
 
 def simulated_annealing(resources: list[int], agent_tasks: list[list[int]], dependencies: list[list[set[int]]],
@@ -248,145 +762,434 @@ def simulated_annealing(resources: list[int], agent_tasks: list[list[int]], depe
                  candidate_moves: int = 500,
                  initial_temperature: float = 1.0,
                  cooling_rate: float = 0.99,
-                 seed: int | None = None) -> list[list[tuple[int, int]]]:
+                 seed: int | None = None,
+                 initial_schedule: list[list[tuple[int, int]]] | None = None,
+                 arrays: tuple | None = None) -> list[list[tuple[int, int]]]:
     """
     Uses a simulated annealing based local search to improve the schedule.
     The objective is to minimize the maximum average cost among agents.
-    
+
     In each iteration, candidate modifications are generated (including:
       - one-task swaps (swapping a task between two time slots or within a slot),
       - one-task moves (moving a task from a later slot to an earlier slot),
       - multi-swap moves (swapping one task with a group of tasks whose total size is equal)
     and accepted with a probability that allows pejorative (worsening) moves.
+
+    The temperature follows the Modified-Lam schedule: it is steered so the
+    measured acceptance rate tracks a phase-dependent target (0.44 during the
+    long middle phase), which removes the per-instance tuning a fixed
+    geometric schedule needs. cooling_rate is kept for API compatibility but
+    no longer drives the schedule.
+
+    initial_schedule, when given, is improved instead of a fresh greedy
+    schedule; it is not mutated. arrays, when given, is the tuple from
+    prepare_instance for this instance.
     """
-    # Initial schedule from the greedy algorithm.
-    schedule = greedy_schedule(resources, agent_tasks, dependencies)
-    agents_dag = create_agents_dag(agent_tasks, dependencies)
-    num_agents = len(agents_dag)
-    
-    current_schedule = schedule
-    best_schedule = [row[:] for row in schedule]
-    best_cost = evaluate_max_agent_cost(best_schedule, num_agents)
+    # Initial schedule from the greedy algorithm, unless the caller
+    # supplied one.
+    if initial_schedule is not None:
+        schedule = initial_schedule
+    else:
+        schedule = greedy_schedule(resources, agent_tasks, dependencies, arrays=arrays)
+    improved = _run_search_core(resources, agent_tasks, dependencies, schedule,
+                                max_iter, candidate_moves, seed, True, initial_temperature,
+                                arrays=arrays)
+    if improved is not None:
+        return improved
+    csr = build_csr(agent_tasks, dependencies)
+    pred_csr = build_pred_csr(dependencies)
+    topo_rank = build_topo_rank(csr)
+    sizes = csr[0]
+    num_agents = len(agent_tasks)
+
+    agent_of, task_of = schedule_to_soa(schedule)
+    best_agent_of = [arr[:] for arr in agent_of]
+    best_task_of = [arr[:] for arr in task_of]
+    agent_sum, agent_count = compute_agent_sums(agent_of, task_of, num_agents)
+    best_cost = max_avg_cost_with_delta(agent_sum, agent_count, {})
     current_cost = best_cost
-    
+
+    # Cached invariants, updated incrementally on every accepted move.
+    slot_load = compute_slot_loads(agent_of, task_of, sizes)
+    pos = compute_positions(agent_of, task_of)
+    _, succ_ptr, _, indeg = csr
+    for k in range(num_agents):
+        for i in range(len(agent_tasks[k])):
+            if (indeg[k][i] > 0 or succ_ptr[k][i + 1] > succ_ptr[k][i]) and (k, i) not in pos:
+                # An unscheduled task with dependency edges makes every
+                # candidate infeasible, so no move can ever be accepted.
+                return schedule
+
     no_improve_count = 0
     T = initial_temperature  # initial temperature for simulated annealing
+    accept_rate = 0.5  # EMA of the acceptance rate, for the Modified-Lam control
+
+    # Draws come from a local Random instance: nothing global gets reseeded,
+    # and binding the methods to locals avoids a module attribute lookup on
+    # every draw in the hot loop.
+    rng = random.Random(seed)
+    rand, randint, choice = rng.random, rng.randint, rng.choice
+
+    # Short-term memory of recently tried move signatures: re-sampling a
+    # just-tried move would only repeat its feasibility check and
+    # evaluation, so such candidates are skipped before any state is
+    # touched. Accepted moves are remembered too, which keeps the reverse
+    # move from immediately ping-ponging back.
+    tabu = deque(maxlen=256)
+    tabu_set = set()
+
+    def remember_move(sig):
+        if len(tabu) == tabu.maxlen:
+            tabu_set.discard(tabu[0])
+        tabu.append(sig)
+        tabu_set.add(sig)
 
-    random.seed(seed)
-    
     for iteration in range(max_iter):
-        # Make a deep copy of the current schedule.
-        candidate_schedule = [row[:] for row in current_schedule]
+        # Moves are applied to the schedule in place and undone on rejection,
+        # so no per-iteration copy of the schedule is needed.
+        move_choice = rand()
+        # Tasks relocated by the move, as (agent, task, old_slot, new_slot)
+        # with 1-indexed slots, plus the touched slots and their load deltas;
+        # used for the incremental evaluation and feasibility check.
+        moved = []
 
-        move_choice = random.random()
-        
         # --- 1. One-task swap move ---
         if move_choice < 0.33:
             # Choose two time slots at random.
-            t1 = random.randint(0, len(candidate_schedule)-1)
-            t2 = random.randint(0, len(candidate_schedule)-1)
+            t1 = randint(0, len(agent_of)-1)
+            t2 = randint(0, len(agent_of)-1)
             if t1 == t2:
                 continue
 
             # Swap one task from t1 with one task from t2.
-            if candidate_schedule[t1] and candidate_schedule[t2]:
-                idx1 = random.randint(0, len(candidate_schedule[t1]) - 1)
-                idx2 = random.randint(0, len(candidate_schedule[t2]) - 1)
-                candidate_schedule[t1][idx1], candidate_schedule[t2][idx2] = (
-                    candidate_schedule[t2][idx2], candidate_schedule[t1][idx1])
+            if agent_of[t1] and agent_of[t2]:
+                idx1 = randint(0, len(agent_of[t1]) - 1)
+                idx2 = randint(0, len(agent_of[t2]) - 1)
+                agent1, task1 = agent_of[t1][idx1], task_of[t1][idx1]
+                agent2, task2 = agent_of[t2][idx2], task_of[t2][idx2]
+                sig = ('swap', agent1, task1, agent2, task2, t1, t2)
+                if sig in tabu_set:
+                    continue
+                agent_of[t1][idx1], task_of[t1][idx1] = agent2, task2
+                agent_of[t2][idx2], task_of[t2][idx2] = agent1, task1
+                undo = ('swap', t1, idx1, t2, idx2)
+                moved.append((agent1, task1, t1+1, t2+1))
+                moved.append((agent2, task2, t2+1, t1+1))
+                size1 = sizes[agent1][task1]
+                size2 = sizes[agent2][task2]
+                touched = (t1, t2)
+                load_delta = {t1: size2 - size1, t2: size1 - size2}
             else:
                 continue
-        
+
         # --- 2. One-task move (relocation) ---
         elif move_choice < 0.66:
             # Move a task from a later time slot to an earlier one.
-            t_from = random.randint(1, len(candidate_schedule)-1)
-            if not candidate_schedule[t_from]:
+            t_from = randint(1, len(agent_of)-1)
+            if not agent_of[t_from]:
+                continue
+            idx = randint(0, len(agent_of[t_from]) - 1)
+            agent, task = agent_of[t_from][idx], task_of[t_from][idx]
+            t_to = randint(0, t_from-1)
+            sig = ('relocate', agent, task, t_from, t_to)
+            if sig in tabu_set:
                 continue
-            idx = random.randint(0, len(candidate_schedule[t_from]) - 1)
-            task = candidate_schedule[t_from].pop(idx)
-            t_to = random.randint(0, t_from-1)
-            insert_idx = random.randint(0, len(candidate_schedule[t_to]))
-            candidate_schedule[t_to].insert(insert_idx, task)
-        
+            agent_of[t_from].pop(idx)
+            task_of[t_from].pop(idx)
+            insert_idx = randint(0, len(agent_of[t_to]))
+            agent_of[t_to].insert(insert_idx, agent)
+            task_of[t_to].insert(insert_idx, task)
+            undo = ('relocate', t_from, idx, t_to, insert_idx)
+            moved.append((agent, task, t_from+1, t_to+1))
+            task_size = sizes[agent][task]
+            touched = (t_from, t_to)
+            load_delta = {t_from: -task_size, t_to: task_size}
+
         # --- 3. Multi-swap move: swap one task with a group of tasks ---
         else:
             # Select a time slot with at least one task.
-            t_from = random.randint(0, len(candidate_schedule)-1)
-            if not candidate_schedule[t_from]:
+            t_from = randint(0, len(agent_of)-1)
+            if not agent_of[t_from]:
                 continue
-            idx_from = random.randint(0, len(candidate_schedule[t_from]) - 1)
-            task_from = candidate_schedule[t_from][idx_from]
-            agent_from, task_id_from = task_from
-            size_from = agents_dag[agent_from].nodes[task_id_from]['size']
-            
+            idx_from = randint(0, len(agent_of[t_from]) - 1)
+            agent_from = agent_of[t_from][idx_from]
+            task_id_from = task_of[t_from][idx_from]
+            size_from = sizes[agent_from][task_id_from]
+
             # Choose a different time slot that has at least 2 tasks.
-            valid_slots = [t for t in range(len(candidate_schedule)) 
-                        if t != t_from and len(candidate_schedule[t]) >= 2]
+            valid_slots = [t for t in range(len(agent_of))
+                        if t != t_from and len(agent_of[t]) >= 2]
             if not valid_slots:
                 continue
-            t_to = random.choice(valid_slots)
-            tasks_in_t_to = candidate_schedule[t_to]
-            
-            # Try to find a group of at least 2 tasks in t_to whose sizes sum to size_from.
-            found_group = None
-            for _ in range(50):  # try up to 50 random groups
-                # Randomly choose a group size between 2 and all tasks in t_to.
-                group_size = random.randint(2, len(tasks_in_t_to))
-                candidate_indices = random.sample(range(len(tasks_in_t_to)), group_size)
-                total_size = 0
-                for idx in candidate_indices:
-                    agent, task_id = tasks_in_t_to[idx]
-                    total_size += agents_dag[agent].nodes[task_id]['size']
-                if total_size == size_from:
-                    found_group = candidate_indices
-                    break
+            t_to = choice(valid_slots)
+
+            # Find a group of at least 2 tasks in t_to whose sizes sum to
+            # size_from. The subset-sum DP answers exactly, so the move is
+            # only skipped when no matching group exists at all.
+            found_group = find_group_with_sum(agent_of[t_to], task_of[t_to], sizes, size_from, rng)
             if found_group is None:
-                continue  # no matching group found; skip this move
-            
-            # Perform the swap: remove the chosen task from t_from and the group from t_to,
-            # then swap them.
-            group_tasks = [candidate_schedule[t_to][i] for i in sorted(found_group, reverse=True)]
+                continue  # no matching group exists; skip this move
+
+            group = [(agent_of[t_to][i], task_of[t_to][i]) for i in sorted(found_group, reverse=True)]
+            sig = ('multi', agent_from, task_id_from, t_from, t_to, tuple(group))
+            if sig in tabu_set:
+                continue
+
+            # Perform the swap: remove the chosen task from t_from and the
+            # group from t_to via swap-with-last (O(1) per removal instead of
+            # an O(slot) memmove per pop), append the replacements, then lay
+            # both slots out in topological rank order. Reconstructing exact
+            # positions on rejection is fiddly, so the undo patch keeps a
+            # copy of the two touched slots instead.
+            undo = ('slots', t_from, (agent_of[t_from][:], task_of[t_from][:]),
+                    t_to, (agent_of[t_to][:], task_of[t_to][:]))
             for i in sorted(found_group, reverse=True):
-                candidate_schedule[t_to].pop(i)
-            candidate_schedule[t_from].pop(idx_from)
-            # Insert the group tasks into t_from at the former position.
-            for task in group_tasks:
-                candidate_schedule[t_from].insert(idx_from, task)
-            # Insert the single task into t_to at a random position.
-            insert_idx = random.randint(0, len(candidate_schedule[t_to]))
-            candidate_schedule[t_to].insert(insert_idx, task_from)
-
-        
+                agent_of[t_to][i] = agent_of[t_to][-1]
+                task_of[t_to][i] = task_of[t_to][-1]
+                agent_of[t_to].pop()
+                task_of[t_to].pop()
+            agent_of[t_from][idx_from] = agent_of[t_from][-1]
+            task_of[t_from][idx_from] = task_of[t_from][-1]
+            agent_of[t_from].pop()
+            task_of[t_from].pop()
+            for agent, task in group:
+                agent_of[t_from].append(agent)
+                task_of[t_from].append(task)
+                moved.append((agent, task, t_to+1, t_from+1))
+            agent_of[t_to].append(agent_from)
+            task_of[t_to].append(task_id_from)
+            moved.append((agent_from, task_id_from, t_from+1, t_to+1))
+            # A rank-sorted slot is canonical: within a slot only the order
+            # of same-agent dependent tasks matters, and topological order
+            # never blocks an otherwise feasible move.
+            resort_slot_by_rank(agent_of[t_from], task_of[t_from], topo_rank)
+            resort_slot_by_rank(agent_of[t_to], task_of[t_to], topo_rank)
+            # The group matches size_from, so the slot loads do not change.
+            touched = (t_from, t_to)
+            load_delta = {}
+
+
         # Only proceed if the candidate schedule is feasible.
-        if not is_feasible(candidate_schedule, agents_dag, resources):
+        if not move_is_feasible(agent_of, task_of, csr, pred_csr, resources,
+                                slot_load, pos, touched, load_delta, moved):
+            undo_move(agent_of, task_of, undo)
+            remember_move(sig)
             continue
-        
-        candidate_cost = evaluate_max_agent_cost(candidate_schedule, num_agents)
+
+        # Incremental evaluation: only the agents touched by the move changed.
+        slot_delta = {}
+        for agent, task, t_old, t_new in moved:
+            slot_delta[agent] = slot_delta.get(agent, 0) + (t_new - t_old)
+        candidate_cost = max_avg_cost_with_delta(agent_sum, agent_count, slot_delta)
         delta = candidate_cost - current_cost
-        
+
         # --- Acceptance criterion: simulated annealing ---
-        if delta < 0 or random.random() < math.exp(-delta / T):
+        accepted = delta < 0 or rand() < math.exp(-delta / T)
+        if accepted:
             # Accept the candidate move.
-            current_schedule = candidate_schedule
             current_cost = candidate_cost
-            # Update the best found solution if improved.
+            for agent, slot_d in slot_delta.items():
+                agent_sum[agent] += slot_d
+            for t in touched:
+                slot_load[t] += load_delta.get(t, 0)
+                for idx in range(len(agent_of[t])):
+                    pos[(agent_of[t][idx], task_of[t][idx])] = (t, idx)
+            # Update the best found solution if improved; only then is a
+            # snapshot of the schedule taken.
             if candidate_cost < best_cost:
-                best_schedule = candidate_schedule
+                best_agent_of = [arr[:] for arr in agent_of]
+                best_task_of = [arr[:] for arr in task_of]
                 best_cost = candidate_cost
                 no_improve_count = 0
             else:
                 no_improve_count += 1
         else:
+            undo_move(agent_of, task_of, undo)
             no_improve_count += 1
-        
-        # Cool down the temperature.
-        T *= cooling_rate
-        
+        remember_move(sig)
+
+        # Modified-Lam temperature control: early on the target acceptance
+        # rate decays from ~1 to 0.44, holds at 0.44 through the middle of
+        # the run, then decays towards 0 for the final convergence phase.
+        # The temperature is nudged multiplicatively so the EMA of the
+        # measured acceptance rate tracks that target.
+        accept_rate = 0.998 * accept_rate + 0.002 * (1.0 if accepted else 0.0)
+        frac = iteration / max_iter
+        if frac < 0.15:
+            target_rate = 0.44 + 0.56 * 560.0 ** (-frac / 0.15)
+        elif frac < 0.65:
+            target_rate = 0.44
+        else:
+            target_rate = 0.44 * 440.0 ** (-(frac - 0.65) / 0.35)
+        if accept_rate > target_rate:
+            T *= 0.995
+        else:
+            T /= 0.995
+
         # Optionally, stop if no improvement has been seen for a number of moves.
         if no_improve_count >= candidate_moves:
             break
-    
-    return best_schedule
 
-    
+    return soa_to_schedule(best_agent_of, best_task_of)
+
+
+
+# Instance shared by all jobs of a worker process. The instance never
+# changes between jobs, so the pool initializer installs it once per
+# worker and the per-job tuples carry only what varies (schedule, seed,
+# temperature); nothing invariant is pickled per job.
+_worker_instance = None
+
+def _set_worker_instance(instance: tuple) -> None:
+    """Pool initializer: runs once per worker, before any job."""
+    global _worker_instance
+    _worker_instance = instance
+
+def _sa_run(args: tuple) -> tuple[float, list[list[tuple[int, int]]]]:
+    """Worker for simulated_annealing_parallel: one annealing run, returns (cost, schedule)."""
+    resources, agent_tasks, dependencies, arrays = _worker_instance
+    max_iter, candidate_moves, initial_temperature, cooling_rate, seed = args
+    schedule = simulated_annealing(resources, agent_tasks, dependencies,
+                                   max_iter=max_iter,
+                                   candidate_moves=candidate_moves,
+                                   initial_temperature=initial_temperature,
+                                   cooling_rate=cooling_rate,
+                                   seed=seed,
+                                   arrays=arrays)
+    return evaluate_max_agent_cost(schedule, len(agent_tasks)), schedule
+
+def simulated_annealing_parallel(resources: list[int], agent_tasks: list[list[int]], dependencies: list[list[set[int]]],
+                 max_iter: int = 100000,
+                 candidate_moves: int = 500,
+                 initial_temperature: float = 1.0,
+                 cooling_rate: float = 0.99,
+                 seed: int | None = None,
+                 num_workers: int | None = None) -> list[list[tuple[int, int]]]:
+    """
+    Multi-start simulated annealing: runs independent annealers in worker
+    processes, each with its own seed and a progressively hotter starting
+    temperature, and returns the best schedule found. Annealing is
+    embarrassingly parallel across restarts, so wall-clock quality improves
+    roughly with the worker count at no algorithmic cost.
+    """
+    if num_workers is None:
+        num_workers = min(os.cpu_count() or 1, 8)
+    base = random.Random(seed)
+    instance = (resources, agent_tasks, dependencies,
+                prepare_instance(resources, agent_tasks, dependencies))
+    jobs = [(max_iter, candidate_moves,
+             initial_temperature * (1.0 + w / 2), cooling_rate,
+             base.randrange(2**31))
+            for w in range(num_workers)]
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=_set_worker_instance,
+                             initargs=(instance,)) as pool:
+        results = list(pool.map(_sa_run, jobs))
+    return min(results, key=lambda result: result[0])[1]
+
+def _replica_segment(args: tuple) -> tuple[float, list[list[tuple[int, int]]]]:
+    """
+    Worker for simulated_annealing_replica_exchange: one fixed-temperature
+    Metropolis segment on the replica's current schedule. Falls back to a
+    fresh greedy-started run when the compiled loop does not apply (no
+    numba, partial placements).
+    """
+    resources, agent_tasks, dependencies, arrays = _worker_instance
+    schedule, swap_every, candidate_moves, temperature, seed = args
+    improved = _run_search_core(resources, agent_tasks, dependencies, schedule,
+                                swap_every, candidate_moves, seed, True, temperature,
+                                adaptive=False, arrays=arrays)
+    if improved is None:
+        improved = simulated_annealing(resources, agent_tasks, dependencies,
+                                       max_iter=swap_every,
+                                       candidate_moves=candidate_moves,
+                                       initial_temperature=temperature,
+                                       seed=seed)
+    return evaluate_max_agent_cost(improved, len(agent_tasks)), improved
+
+def simulated_annealing_replica_exchange(resources: list[int], agent_tasks: list[list[int]], dependencies: list[list[set[int]]],
+                 max_iter: int = 100000,
+                 candidate_moves: int = 500,
+                 num_replicas: int = 4,
+                 swap_every: int = 2000,
+                 initial_temperature: float = 0.02,
+                 temp_ratio: float = 4.0,
+                 seed: int | None = None,
+                 num_workers: int | None = None,
+                 initial_schedule: list[list[tuple[int, int]]] | None = None,
+                 arrays: tuple | None = None) -> list[list[tuple[int, int]]]:
+    """
+    Parallel-tempering simulated annealing: num_replicas annealers run
+    concurrent fixed-temperature segments of swap_every iterations at a
+    ladder of temperatures initial_temperature * temp_ratio**i, with the
+    cold end sized so a typical unit cost step is rarely accepted and the
+    hot end so it usually is. After each round,
+    adjacent replicas attempt a Metropolis state swap with probability
+    exp((c_i - c_j) * (1/T_i - 1/T_j)), so schedules found by the hot,
+    exploratory replicas migrate down the ladder to the cold, exploiting
+    ones instead of being thrown away as in independent restarts. Returns
+    the best schedule seen by any replica.
+    """
+    if num_workers is None:
+        num_workers = min(os.cpu_count() or 1, num_replicas)
+    base = random.Random(seed)
+    num_agents = len(agent_tasks)
+    temps = [initial_temperature * temp_ratio ** i for i in range(num_replicas)]
+
+    # Flatten once; every segment of every round reuses the same arrays.
+    if arrays is None:
+        arrays = prepare_instance(resources, agent_tasks, dependencies)
+    if initial_schedule is not None:
+        schedule = initial_schedule
+    else:
+        schedule = greedy_schedule(resources, agent_tasks, dependencies, arrays=arrays)
+    states = [schedule for _ in range(num_replicas)]
+    costs = [evaluate_max_agent_cost(schedule, num_agents)] * num_replicas
+    best_cost, best = costs[0], schedule
+
+    rounds = max(1, max_iter // max(1, swap_every))
+    instance = (resources, agent_tasks, dependencies, arrays)
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=_set_worker_instance,
+                             initargs=(instance,)) as pool:
+        for round_idx in range(rounds):
+            jobs = [(states[i], swap_every,
+                     candidate_moves, temps[i], base.randrange(2**31))
+                    for i in range(num_replicas)]
+            for i, (cost, state) in enumerate(pool.map(_replica_segment, jobs)):
+                costs[i], states[i] = cost, state
+                if cost < best_cost:
+                    best_cost, best = cost, state
+            # Metropolis swaps between adjacent replicas; the alternating
+            # parity keeps the pairs of one round disjoint.
+            for i in range(round_idx % 2, num_replicas - 1, 2):
+                exponent = (costs[i] - costs[i + 1]) * (1.0 / temps[i] - 1.0 / temps[i + 1])
+                if exponent >= 0 or base.random() < math.exp(exponent):
+                    states[i], states[i + 1] = states[i + 1], states[i]
+                    costs[i], costs[i + 1] = costs[i + 1], costs[i]
+    return best
+
+def _warmup_kernels() -> None:
+    """
+    Touches every compiled kernel once on a two-agent toy instance, so the
+    one-off JIT compile (or warm-cache load, once compile_solvers.py has
+    populated the cache) happens at import time instead of inside the
+    first solver call a caller happens to time.
+    """
+    resources = [2, 3]
+    agent_tasks = [[1, 1], [2]]
+    dependencies = [[set(), {0}], [set()]]
+    arrays = flatten_instance(resources, agent_tasks, dependencies)
+    count, out_agent, out_task, out_slot = greedy_schedule_nb(*arrays)
+    evaluate_max_cost_nb(out_agent[:count], out_slot[:count], len(agent_tasks))
+    if _HAVE_SEARCH_KERNELS:
+        resources_arr, task_ptr, sizes, succ_ptr, succ_idx, indeg = arrays
+        slot_init = out_slot[:count].copy()
+        for j in range(count):
+            slot_init[task_ptr[out_agent[j]] + out_task[j]] = out_slot[j]
+        search_core_nb(resources_arr, task_ptr, sizes, succ_ptr, succ_idx,
+                       indeg, slot_init, 0, 2, 1, True, 1.0, True)
+
+# SKIP_WARMUP=1 opts out, for tools that import the module without solving.
+if _HAVE_KERNELS and os.environ.get("SKIP_WARMUP") != "1":
+    _warmup_kernels()
@@ -1,28 +1,171 @@
+from bisect import bisect_left, bisect_right
+
 import pulp
 
-def minimize_max_avg_cost(c, task_sizes, dependencies):
+from heuristic_solver import build_dep_masks, greedy_schedule
+
+def compute_slot_windows(c, task_sizes, dependencies, T):
+    """
+    Computes for each task the window [earliest[k][i], latest[k][i]] of slots
+    at which it can possibly complete. The model lets a task share a slot
+    with its dependencies, so path length alone prunes nothing; what does
+    bind is capacity: a task and all of its ancestors must fit in the
+    cumulative capacity up to t, and its descendants in what remains after
+    t. Ancestor/descendant sets are accumulated as bitmasks along a Kahn
+    order, O(V + E) mask operations per agent.
+    """
+    prefix_cap = [0] * (T + 1)
+    for t in range(T):
+        prefix_cap[t + 1] = prefix_cap[t] + c[t]
+    total_cap = prefix_cap[T]
+
+    earliest, latest = [], []
+    for k, deps_k in enumerate(dependencies):
+        n = len(deps_k)
+        succs = [[] for _ in range(n)]
+        indeg = [len(deps) for deps in deps_k]
+        for i, deps in enumerate(deps_k):
+            for dep in deps:
+                succs[dep].append(i)
+        order = [i for i in range(n) if indeg[i] == 0]
+        for u in order:
+            for v in succs[u]:
+                indeg[v] -= 1
+                if indeg[v] == 0:
+                    order.append(v)
+
+        # anc[i]/desc[i]: bitmask of i's ancestors/descendants, i included.
+        anc = [1 << i for i in range(n)]
+        for u in order:
+            for dep in deps_k[u]:
+                anc[u] |= anc[dep]
+        desc = [1 << i for i in range(n)]
+        for u in reversed(order):
+            for dep in deps_k[u]:
+                desc[dep] |= desc[u]
+
+        def mask_size(mask):
+            total = 0
+            while mask:
+                low = mask & -mask
+                total += task_sizes[k][low.bit_length() - 1]
+                mask ^= low
+            return total
+
+        # Smallest t with prefix_cap[t] >= ancestor load, largest t whose
+        # remaining capacity total_cap - prefix_cap[t-1] still holds the
+        # descendant load; both windows can be empty on infeasible input.
+        earliest.append([max(1, bisect_left(prefix_cap, mask_size(anc[i])))
+                         for i in range(n)])
+        latest.append([min(T, bisect_right(prefix_cap, total_cap - mask_size(desc[i])))
+                       for i in range(n)])
+    return earliest, latest
+
+def group_interchangeable_tasks(task_sizes, dependencies):
+    """
+    Groups, per agent, tasks that are interchangeable in the model: same
+    size, same dependency set and same dependent set. Swapping two such
+    tasks in any feasible schedule yields another feasible schedule of
+    identical cost, so the ILP can count a group with one integer variable
+    instead of branching over equivalent binaries.
+
+    Because the signature includes the dependent set, every dependency set
+    is a union of whole groups; group_deps can therefore express the
+    precedence structure group-to-group.
     """
+    dep_masks = build_dep_masks(dependencies)
+    groups, group_deps = [], []
+    for k, deps_k in enumerate(dependencies):
+        n = len(deps_k)
+        succ_mask = [0] * n
+        for i, deps in enumerate(deps_k):
+            for dep in deps:
+                succ_mask[dep] |= 1 << i
+
+        # Dependency and dependent sets compare as packed bitmasks; two
+        # ints hash and compare faster than frozensets.
+        by_sig = {}
+        for i in range(n):
+            sig = (task_sizes[k][i], dep_masks[k][i], succ_mask[i])
+            by_sig.setdefault(sig, []).append(i)
+        groups_k = list(by_sig.values())
+
+        group_of = [0] * n
+        for g, members in enumerate(groups_k):
+            for i in members:
+                group_of[i] = g
+        group_deps_k = [{group_of[dep] for dep in deps_k[members[0]]}
+                        for members in groups_k]
+
+        groups.append(groups_k)
+        group_deps.append(group_deps_k)
+    return groups, group_deps
+
+def build_model(c, task_sizes, dependencies):
+    """
+    Builds the ILP for an instance without solving it: variables,
+    constraints and the greedy warm-start values. The model depends only
+    on the instance, so callers re-solving the same instance can build it
+    once and hand it to solve_model repeatedly.
+
     Parameters:
         c: List of resource capacities at each time t (list of int)
         task_sizes: List of lists, where task_sizes[k][i] is the size of task i for agent k
         dependencies: List of lists of sets, where dependencies[k][i] is the set of indices
                       of tasks that must be completed before task i for agent k
     """
-    
+
     K = len(task_sizes)
     N = [len(tasks) for tasks in task_sizes]
     T = len(c)
 
+    # Greedy warm start: a feasible schedule hands CBC an incumbent to prune
+    # from immediately, and its makespan bounds the horizon worth modelling.
+    greedy = greedy_schedule(c, task_sizes, dependencies)
+    placed = {}
+    for t, tasks in enumerate(greedy, start=1):
+        for k, i in tasks:
+            placed[(k, i)] = t
+    warm_start = len(placed) == sum(N)
+    if warm_start:
+        # Two slots of slack past the greedy makespan: the optimum may delay
+        # a task slightly to relieve an earlier slot, but rarely further.
+        T = min(T, max(placed.values()) + 2)
+
+    # Per-task feasible slot windows; variables outside them are always zero
+    # and are simply never created.
+    earliest, latest = compute_slot_windows(c, task_sizes, dependencies, T)
+
+    # Interchangeable tasks collapse into one integer count per group and
+    # slot. Members of a group share size, dependencies and dependents, so
+    # their slot windows coincide; the union is taken to stay safe.
+    groups, group_deps = group_interchangeable_tasks(task_sizes, dependencies)
+    mult = [[len(members) for members in groups[k]] for k in range(K)]
+    g_size = [[task_sizes[k][members[0]] for members in groups[k]] for k in range(K)]
+    g_earliest = [[min(earliest[k][i] for i in members) for members in groups[k]]
+                  for k in range(K)]
+    g_latest = [[max(latest[k][i] for i in members) for members in groups[k]]
+                for k in range(K)]
+
     # Create the problem
     problem = pulp.LpProblem("Minimize_Max_Avg_Cost", pulp.LpMinimize)
 
-    # Decision variables: x[k][i][t] is 1 if task i of agent k is completed at time t
-    x = {
-        (k, i, t): pulp.LpVariable(f"x_{k}_{i}_{t}", cat="Binary")
-        for k in range(K)
-        for i in range(N[k])
-        for t in range(1, T + 1)
-    }
+    # Decision variables: y[k][g][t] counts how many tasks of group g of
+    # agent k complete at time t. Singleton groups stay plain binaries, so
+    # the formulation reduces to the per-task one when no tasks repeat.
+    # u[k][g][t] flags that any member of a dependent group completes at t;
+    # a singleton's y is already that flag.
+    y, u = {}, {}
+    for k in range(K):
+        for g in range(len(groups[k])):
+            m = mult[k][g]
+            for t in range(g_earliest[k][g], g_latest[k][g] + 1):
+                if m == 1:
+                    y[k, g, t] = u[k, g, t] = pulp.LpVariable(f"y_{k}_{g}_{t}", cat="Binary")
+                else:
+                    y[k, g, t] = pulp.LpVariable(f"y_{k}_{g}_{t}", lowBound=0, upBound=m, cat="Integer")
+                    if group_deps[k][g]:
+                        u[k, g, t] = pulp.LpVariable(f"u_{k}_{g}_{t}", cat="Binary")
 
     # Auxiliary variable for the maximum average cost
     z = pulp.LpVariable("z", lowBound=0)
@@ -31,27 +174,37 @@ def minimize_max_avg_cost(c, task_sizes, dependencies):
     problem += z
 
     # Constraints
-    # (1) Each task is executed exactly once
+    # (1) Each group completes exactly its multiplicity
     for k in range(K):
-        for i in range(N[k]):
-            problem += pulp.lpSum(x[k, i, t] for t in range(1, T + 1)) == 1
+        for g in range(len(groups[k])):
+            problem += pulp.lpSum(y[k, g, t]
+                                  for t in range(g_earliest[k][g], g_latest[k][g] + 1)) == mult[k][g]
 
-    # (2) Task dependencies
+    # (2) Group dependencies: members of g may complete at t only once every
+    # member of each dependency group has completed by t
     for k in range(K):
-        for i in range(N[k]):
-            for t in range(1, T + 1):
-                for dep in dependencies[k][i]:
+        for g in range(len(groups[k])):
+            if not group_deps[k][g]:
+                continue
+            for t in range(g_earliest[k][g], g_latest[k][g] + 1):
+                if mult[k][g] > 1:
+                    problem += y[k, g, t] <= mult[k][g] * u[k, g, t]
+                for dep in group_deps[k][g]:
                     problem += (
-                        pulp.lpSum(x[k, dep, t_prime] for t_prime in range(1, t + 1)) >= x[k, i, t]
+                        pulp.lpSum(y[k, dep, t_prime]
+                                   for t_prime in range(g_earliest[k][dep],
+                                                        min(t, g_latest[k][dep]) + 1))
+                        >= mult[k][dep] * u[k, g, t]
                     )
 
     # (3) Resource capacity constraints
     for t in range(1, T + 1):
         problem += (
             pulp.lpSum(
-                task_sizes[k][i] * x[k, i, t]
+                g_size[k][g] * y[k, g, t]
                 for k in range(K)
-                for i in range(N[k])
+                for g in range(len(groups[k]))
+                if g_earliest[k][g] <= t <= g_latest[k][g]
             )
             <= c[t - 1]
         )
@@ -61,15 +214,52 @@ def minimize_max_avg_cost(c, task_sizes, dependencies):
         avg_cost_k = (
             1 / N[k]
             * pulp.lpSum(
-                t * x[k, i, t]
-                for i in range(N[k])
-                for t in range(1, T + 1)
+                t * y[k, g, t]
+                for g in range(len(groups[k]))
+                for t in range(g_earliest[k][g], g_latest[k][g] + 1)
             )
         )
         problem += z >= avg_cost_k
 
-    # Solve the problem
-    problem.solve(pulp.PULP_CBC_CMD(msg=0))
+    # Seed CBC with the greedy schedule when it placed every task.
+    if warm_start:
+        counts = {}
+        for k in range(K):
+            for g, members in enumerate(groups[k]):
+                for i in members:
+                    key = (k, g, placed[k, i])
+                    counts[key] = counts.get(key, 0) + 1
+        for (k, g, t), var in y.items():
+            var.setInitialValue(counts.get((k, g, t), 0))
+        for (k, g, t), var in u.items():
+            if mult[k][g] > 1:
+                var.setInitialValue(1 if counts.get((k, g, t), 0) else 0)
+        z.setInitialValue(max(
+            sum(t for (k, i), t in placed.items() if k == agent) / N[agent]
+            for agent in range(K)
+        ))
+
+    return {
+        "problem": problem,
+        "y": y,
+        "groups": groups,
+        "g_earliest": g_earliest,
+        "g_latest": g_latest,
+        "num_slots": len(c),
+        "K": K,
+        "warm_start": warm_start,
+    }
+
+def solve_model(model):
+    """
+    Solves a model from build_model and expands the group counts back to a
+    per-slot schedule; returns None when CBC reports anything but Optimal.
+    """
+    problem = model["problem"]
+    if model["warm_start"]:
+        problem.solve(pulp.PULP_CBC_CMD(msg=0, warmStart=True))
+    else:
+        problem.solve(pulp.PULP_CBC_CMD(msg=0))
 
     # Output results
     status = pulp.LpStatus[problem.status]
@@ -77,14 +267,50 @@ def minimize_max_avg_cost(c, task_sizes, dependencies):
         print(f"Solver did not find an optimal solution: {status}")
         return None
 
-    schedule = [[] for _ in range(T)]  # Create an empty schedule for each time slot
+    y = model["y"]
+    groups = model["groups"]
+    g_earliest = model["g_earliest"]
+    g_latest = model["g_latest"]
+    schedule = [[] for _ in range(model["num_slots"])]  # Create an empty schedule for each time slot
 
-    for (k, i, t), value in x.items():
-        if pulp.value(value) == 1:
-            schedule[t - 1].append([k, i])
+    # Expand the group counts back to individual tasks; members are
+    # interchangeable, so any assignment of members to slots is valid.
+    for k in range(model["K"]):
+        for g, members in enumerate(groups[k]):
+            times = []
+            for t in range(g_earliest[k][g], g_latest[k][g] + 1):
+                times.extend([t] * int(round(pulp.value(y[k, g, t]) or 0)))
+            times.sort()
+            for i, t in zip(members, times):
+                schedule[t - 1].append([k, i])
 
     return schedule
 
+# Built models per instance: model construction often dominates the solve
+# for small problems, so repeated calls on the same instance skip it. The
+# key is a canonical tuple form of the inputs; the cache stays small.
+_model_cache = {}
+_MODEL_CACHE_MAX = 8
+
+def _instance_key(c, task_sizes, dependencies):
+    return (tuple(c),
+            tuple(tuple(tasks) for tasks in task_sizes),
+            tuple(tuple(frozenset(deps) for deps in deps_k) for deps_k in dependencies))
+
+def minimize_max_avg_cost(c, task_sizes, dependencies):
+    """
+    Builds (or reuses) the ILP for the instance and solves it; see
+    build_model for the parameters.
+    """
+    key = _instance_key(c, task_sizes, dependencies)
+    model = _model_cache.get(key)
+    if model is None:
+        model = build_model(c, task_sizes, dependencies)
+        if len(_model_cache) >= _MODEL_CACHE_MAX:
+            _model_cache.pop(next(iter(_model_cache)))
+        _model_cache[key] = model
+    return solve_model(model)
+
 
 
 